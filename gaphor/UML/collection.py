@@ -49,16 +49,50 @@ class collectionlist(recursemixin, querymixin, list):
 class collection:
     """
     Collection (set-like) for model elements' 1:n and n:m relationships.
+
+    The elements are stored in an (insertion ordered) dict, so membership
+    tests, additions and removals are O(1), even for big collections. For
+    index access and queries a list is created on demand.
     """
 
     def __init__(self, property, object, type):
         self.property = property
         self.object = object
         self.type = type
-        self.items = collectionlist()
+        self._members = {}
+        self._items = collectionlist()
+
+    @property
+    def items(self):
+        """
+        The elements in this collection, as a ``collectionlist``.
+        """
+        items = self._items
+        if items is None:
+            items = self._items = collectionlist(self._members)
+        return items
+
+    def _add(self, value):
+        """
+        Add a value to the collection. This method is used by the
+        association property; it does not send events.
+        """
+        self._members[value] = None
+        if self._items is not None:
+            self._items.append(value)
+
+    def _remove(self, value):
+        """
+        Remove a value from the collection. This method is used by the
+        association property; it does not send events.
+
+        Raises a ``KeyError`` if value is not part of the collection.
+        """
+        del self._members[value]
+        self._items = None
 
     def __len__(self):
-        return len(self.items)
+        return len(self._members)
 
     def __setitem__(self, key, value):
         raise RuntimeError("items should not be overwritten.")
@@ -70,7 +104,7 @@ class collection:
         return self.items.__getitem__(key)
 
     def __contains__(self, obj):
-        return self.items.__contains__(obj)
+        return obj in self._members
 
     def __iter__(self):
         return iter(self.items)
@@ -81,7 +115,7 @@ class collection:
     __repr__ = __str__
 
     def __bool__(self):
-        return self.items != []
+        return bool(self._members)
 
     # Maintains Python2 Compatibility
     __nonzero__ = __bool__
@@ -93,7 +127,7 @@ class collection:
             raise TypeError(f"Object is not of type {self.type.__name__}")
 
     def remove(self, value):
-        if value in self.items:
+        if value in self._members:
             self.property.__delete__(self.object, value)
         else:
             raise ValueError(f"{value} not in collection")
@@ -108,10 +142,10 @@ class collection:
     # OCL members (from SMW by Ivan Porres, http://www.abo.fi/~iporres/smw)
 
     def size(self):
-        return len(self.items)
+        return len(self._members)
 
     def includes(self, o):
-        return o in self.items
+        return o in self._members
 
     def excludes(self, o):
         return not self.includes(o)
@@ -125,13 +159,13 @@ class collection:
 
     def includesAll(self, c):
         for o in c:
-            if o not in self.items:
+            if o not in self._members:
                 return 0
         return 1
 
     def excludesAll(self, c):
         for o in c:
-            if o in self.items:
+            if o in self._members:
                 return 0
         return 1
 
@@ -156,7 +190,7 @@ class collection:
         return result
 
     def isEmpty(self):
-        return len(self.items) == 0
+        return len(self._members) == 0
 
     def nonEmpty(self):
         return not self.isEmpty()
@@ -233,9 +267,11 @@ class collection:
         Swap two elements. Return true if swap was successful.
         """
         try:
-            i1 = self.items.index(item1)
-            i2 = self.items.index(item2)
-            self.items[i1], self.items[i2] = self.items[i2], self.items[i1]
+            items = self.items
+            i1 = items.index(item1)
+            i2 = items.index(item2)
+            items[i1], items[i2] = items[i2], items[i1]
+            self._members = dict.fromkeys(items)
 
             self.object.handle(AssociationChangeEvent(self.object, self.property))
             return True
@@ -10,6 +10,7 @@ import uuid
 import gaphas
 
 from gaphor.UML.uml2 import Namespace, PackageableElement
+from gaphor.transaction import Transaction
 
 
 class DiagramCanvas(gaphas.Canvas):
@@ -25,9 +26,55 @@ class DiagramCanvas(gaphas.Canvas):
         super().__init__()
         self._diagram = diagram
         self._block_updates = False
+        self._shown = 0
+        self._watching = self.watching
 
     diagram = property(lambda s: s._diagram)
 
+    @property
+    def watching(self):
+        """True if the presentation items on this canvas should subscribe
+        their watchers. If the model has lazy watchers enabled, that's only
+        the case while the diagram is shown."""
+
+        lazy = getattr(self._diagram.model, "lazy_watchers", False)
+        return self._shown > 0 or not lazy
+
+    def show(self):
+        """The diagram is shown, e.g. in a diagram page. Make sure the
+        presentation items get notified of changes."""
+
+        self._shown += 1
+        self.update_watchers()
+
+    def hide(self):
+        """The diagram is no longer shown."""
+
+        self._shown -= 1
+        self.update_watchers()
+
+    def update_watchers(self):
+        """Subscribe or unsubscribe the watchers of all presentation items,
+        depending on whether the canvas is watching. Items that start
+        watching are updated, since they may have missed changes."""
+
+        # Diagram is imported by uml2 before Presentation is defined
+        from gaphor.UML.presentation import Presentation
+
+        watching = self.watching
+        if watching == self._watching:
+            return
+        self._watching = watching
+
+        for item in self.get_all_items():
+            if not isinstance(item, Presentation):
+                continue
+            if watching:
+                item.subscribe_all()
+                item.refresh_watched()
+            else:
+                item.unsubscribe_all()
+
     def _set_block_updates(self, block):
         """Sets the block_updates property.  If false, the diagram canvas is
         updated immediately."""
@@ -45,6 +92,41 @@ class DiagramCanvas(gaphas.Canvas):
             return
         super().update_now()
 
+    def _mark_dirty(self):
+        model = self._diagram.model
+        if model:
+            model.mark_dirty(self._diagram)
+
+    def add(self, item, parent=None, index=None):
+        """Add an item to the canvas. The diagram needs to be saved again."""
+
+        super().add(item, parent, index)
+        self._mark_dirty()
+
+    def _remove(self, item):
+        """Remove an item from the canvas. The diagram needs to be saved
+        again."""
+
+        super()._remove(item)
+        self._mark_dirty()
+
+    def reparent(self, item, parent, index=None):
+        """Move an item to another parent. The diagram needs to be saved
+        again."""
+
+        super().reparent(item, parent, index)
+        self._mark_dirty()
+
+    def request_update(self, item, update=True, matrix=True):
+        """Items on the canvas need to be updated. If this happens in a
+        transaction, e.g. because the user moved an item, the diagram needs
+        to be saved again. Updates while loading or drawing the diagram do
+        not change it."""
+
+        super().request_update(item, update, matrix)
+        if Transaction._stack:
+            self._mark_dirty()
+
     def save(self, save_func):
         """Apply the supplied save function to all root diagram items."""
 
@@ -19,7 +19,56 @@ class UnlinkEvent:
         self.element = element
 
 
-class Element:
+class ElementClass(type):
+    """
+    Metaclass for UML data classes.
+
+    It keeps a per-class registry of UML properties, so the class does not
+    have to be scanned every time an element is saved or unlinked.
+    Properties can be added to classes at any time (see ``uml2.py`` and
+    association stubs), hence the registry is invalidated whenever a public
+    class attribute is set or deleted.
+    """
+
+    _generation = 0
+    _umlproperties = {}
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            ElementClass._generation += 1
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        if not name.startswith("_"):
+            ElementClass._generation += 1
+
+    def umlproperties_of(cls):
+        """
+        Return a tuple of all UML properties of this class.
+        """
+        try:
+            generation, props = ElementClass._umlproperties[cls]
+        except KeyError:
+            pass
+        else:
+            if generation == ElementClass._generation:
+                return props
+
+        props = tuple(
+            prop
+            for prop in (
+                getattr(cls, propname)
+                for propname in dir(cls)
+                if not propname.startswith("_")
+            )
+            if isinstance(prop, umlproperty)
+        )
+        ElementClass._umlproperties[cls] = (ElementClass._generation, props)
+        return props
+
+
+class Element(metaclass=ElementClass):
     """
     Base class for UML data classes.
     """
@@ -50,13 +99,7 @@ class Element:
         """
         Iterate over all UML properties
         """
-        umlprop = umlproperty
-        class_ = type(self)
-        for propname in dir(class_):
-            if not propname.startswith("_"):
-                prop = getattr(class_, propname)
-                if isinstance(prop, umlprop):
-                    yield prop
+        return iter(type(self).umlproperties_of())
 
     def save(self, save_func):
         """
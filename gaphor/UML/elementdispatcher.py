@@ -51,6 +51,13 @@ class EventWatcher:
         for path, handler in self._watched_paths.items():
             dispatcher.subscribe(handler, element, path)
 
+    def refresh(self):
+        """
+        Call every handler once, with ``None`` as event.
+        """
+        for handler in set(self._watched_paths.values()):
+            handler(None)
+
     def unsubscribe_all(self, *_args):
         """
         Unregister handlers. Extra arguments are ignored (makes connecting to
@@ -91,14 +98,19 @@ class ElementDispatcher:
 
     logger = getLogger("ElementDispatcher")
 
+    # Compiled paths, shared by all dispatchers:
+    # (element class, path): (property, ..)
+    _paths = dict()
+
     def __init__(self, event_manager):
         self.event_manager = event_manager
         # Table used to fire events:
         # (event.element, event.property): { handler: set(path, ..), ..}
         self._handlers = dict()
 
-        # Fast resolution when handlers are disconnected
-        # handler: [(element, property), ..]
+        # Fast resolution when handlers are disconnected. The keys are kept
+        # in a dict, as an ordered set.
+        # handler: {(element, property): None, ..}
         self._reverse = dict()
 
         self.event_manager.subscribe(self.on_model_loaded)
@@ -112,8 +124,17 @@ class ElementDispatcher:
         """
         Given a start element and a path, return a tuple of UML properties
         (association, attribute, etc.) representing the path.
+
+        Paths are compiled once per element class.
         """
-        c = type(element)
+        key = (type(element), path)
+        try:
+            return self._paths[key]
+        except KeyError:
+            props = self._paths[key] = self._compile_path(type(element), path)
+            return props
+
+    def _compile_path(self, c, path):
         tpath = []
         for attr in path.split("."):
             cname = ""
@@ -156,12 +177,9 @@ class ElementDispatcher:
 
         # Also add them to the reverse table, easing disconnecting
         try:
-            reverse = self._reverse[handler]
+            self._reverse[handler][key] = None
         except KeyError:
-            reverse = []
-            self._reverse[handler] = reverse
-
-        reverse.append(key)
+            self._reverse[handler] = {key: None}
 
         # Apply remaining path
         if remainder:
@@ -199,6 +217,11 @@ class ElementDispatcher:
             self.logger.warning(
                 f"Handler {handler} is not registered for {element}.{property}"
             )
+        else:
+            reverse = self._reverse[handler]
+            reverse.pop(key, None)
+            if not reverse:
+                del self._reverse[handler]
 
         if not handlers:
             del self._handlers[key]
@@ -212,7 +235,7 @@ class ElementDispatcher:
         Unregister a handler from the registy.
         """
         try:
-            reverse = reversed(self._reverse[handler])
+            reverse = reversed(list(self._reverse[handler]))
         except KeyError:
             return
 
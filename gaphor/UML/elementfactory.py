@@ -16,6 +16,20 @@ from gaphor.UML.event import (
 )
 from gaphor.abc import Service
 
+# Functions called with every element that changed or got deleted, see
+# register_change_hook().
+_change_hooks = []
+
+
+def register_change_hook(hook):
+    """
+    Call ``hook(element)`` when an element changes or is deleted. Hooks are
+    called before any event handler, also while events are blocked or
+    batched, so caches of derived data (like formatted text) can invalidate
+    their entries in time.
+    """
+    _change_hooks.append(hook)
+
 
 class ElementFactory(Service):
     """
@@ -36,8 +50,18 @@ class ElementFactory(Service):
             ElementDispatcher(event_manager) if event_manager else None
         )
         self._elements = OrderedDict()
+        # Secondary index: concrete type -> OrderedDict(id -> element)
+        self._elements_by_type = {}
         self._observers = list()
         self._block_events = 0
+        # Only subscribe the watchers of presentation items for diagrams
+        # that are shown (see DiagramCanvas.show()).
+        self.lazy_watchers = False
+        # Elements changed and ids of elements deleted since the model was
+        # loaded or saved (see clear_dirty()).
+        self._dirty = set()
+        self._deleted = set()
+        self.dirty_version = 0
 
     def shutdown(self):
         self.flush()
@@ -58,7 +82,7 @@ class ElementFactory(Service):
         """
         assert issubclass(type, Element)
         obj = type(id, self)
-        self._elements[id] = obj
+        self._register_element(obj)
         return obj
 
     def bind(self, element):
@@ -72,7 +96,7 @@ class ElementFactory(Service):
             raise AttributeError("an element already exists with the same id")
 
         element._model = self
-        self._elements[element.id] = element
+        self._register_element(element)
 
     def size(self):
         """
@@ -108,6 +132,24 @@ class ElementFactory(Service):
         """
         return list(self.select(expression))
 
+    def select_type(self, type, expression=None):
+        """
+        Iterate elements that are an instance of ``type`` (including
+        subclasses) and, optionally, comply with expression.
+
+        Elements are looked up in a type index, so only elements of the
+        requested type are visited. Elements are grouped by their concrete
+        type, in order of creation within a group.
+        """
+        for element_type, elements in list(self._elements_by_type.items()):
+            if issubclass(element_type, type):
+                if expression is None:
+                    yield from list(elements.values())
+                else:
+                    for e in list(elements.values()):
+                        if expression(e):
+                            yield e
+
     def keys(self):
         """
         Return a list with all id's in the factory.
@@ -147,20 +189,60 @@ class ElementFactory(Service):
         self.handle(FlushFactoryEvent(self))
 
         with self.block_events():
-            for element in self.lselect(lambda e: isinstance(e, Diagram)):
+            for element in list(self.select_type(Diagram)):
                 element.canvas.block_updates = True
                 element.unlink()
 
             for element in self.lselect():
                 element.unlink()
 
+        self.clear_dirty()
+
     def notify_model(self):
         """
         Send notification that a new model has been loaded by means of the
         ModelFactoryEvent event from gaphor.UML.event.
         """
+        self.clear_dirty()
         self.handle(ModelFactoryEvent(self))
 
+    def mark_dirty(self, element):
+        """
+        Mark an element as changed. Presentation items are saved as part of
+        their diagram, so the diagram is marked instead.
+        """
+        if self._elements.get(element.id) is not element:
+            canvas = getattr(element, "canvas", None)
+            if not canvas:
+                return
+            element = canvas.diagram
+        self._dirty.add(element)
+        self.dirty_version += 1
+
+    def mark_deleted(self, id):
+        """
+        Mark the element with ``id`` as deleted.
+        """
+        self._deleted.add(id)
+        self.dirty_version += 1
+
+    def dirty(self):
+        """
+        Return the elements changed and the ids of elements deleted since the
+        model was loaded, or clear_dirty() was called.
+        """
+        return (
+            [e for e in self._dirty if self._elements.get(e.id) is e],
+            set(self._deleted),
+        )
+
+    def clear_dirty(self):
+        """
+        Forget about changed elements, e.g. after the model has been saved.
+        """
+        self._dirty.clear()
+        self._deleted.clear()
+
     @contextmanager
     def block_events(self):
         """
@@ -178,11 +260,33 @@ class ElementFactory(Service):
         Handle events coming from elements.
         """
         if type(event) is UnlinkEvent:
+            for hook in _change_hooks:
+                hook(event.element)
             self._unlink_element(event.element)
             event = ElementDeleteEvent(self, event.element)
+        elif isinstance(event, ElementChangeEvent):
+            for hook in _change_hooks:
+                hook(event.element)
+            self.mark_dirty(event.element)
         if self.event_manager and not self._block_events:
             self.event_manager.handle(event)
 
+    def _register_element(self, element):
+        """
+        Add an element to the factory and its indexes.
+
+        NOTE: Also used by the undo manager to restore deleted elements.
+        """
+        self._elements[element.id] = element
+        self._deleted.discard(element.id)
+        self.mark_dirty(element)
+        try:
+            self._elements_by_type[type(element)][element.id] = element
+        except KeyError:
+            self._elements_by_type[type(element)] = OrderedDict(
+                ((element.id, element),)
+            )
+
     def _unlink_element(self, element):
         """
         NOTE: Invoked from Element.unlink() to perform an element unlink.
@@ -191,3 +295,10 @@ class ElementFactory(Service):
             del self._elements[element.id]
         except KeyError:
             pass
+        else:
+            self._dirty.discard(element)
+            self.mark_deleted(element.id)
+        try:
+            del self._elements_by_type[type(element)][element.id]
+        except KeyError:
+            pass
@@ -76,12 +76,15 @@ def apply_stereotype(element, stereotype):
 def find_instances(element):
     """
     Find instance specification which extend classifier `element`.
+
+    Instance specifications are looked up through the (uni-directional)
+    InstanceSpecification.classifier association, instead of querying the
+    whole model.
     """
-    model = element.model
-    return model.select(
-        lambda e: e.isKindOf(InstanceSpecification)
-        and e.classifier
-        and e.classifier[0] == element
+    return (
+        e
+        for e in InstanceSpecification.classifier.referrers(element)
+        if e.classifier[0] is element
     )
 
 
@@ -117,7 +120,7 @@ def get_stereotypes(element):
     names = {c.__name__ for c in cls.__mro__ if issubclass(c, Element)}
 
     # find stereotypes that extend element class
-    classes = model.select(lambda e: e.isKindOf(Class) and e.name in names)
+    classes = model.select_type(Class, lambda e: e.name in names)
 
     stereotypes = {ext.ownedEnd.type for cls in classes for ext in cls.extension}
     return sorted(stereotypes, key=lambda st: st.name)
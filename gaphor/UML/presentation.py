@@ -46,6 +46,14 @@ class Presentation(Element):
         """
         self._watcher.unsubscribe_all()
 
+    def refresh_watched(self):
+        """
+        Invoke the handlers of all watched paths, to catch up with changes
+        made while they were not subscribed. Handlers receive ``None`` as
+        event.
+        """
+        self._watcher.refresh()
+
     def unlink(self):
         """
         Remove the item from the canvas and set subject to None.
@@ -56,7 +64,8 @@ class Presentation(Element):
 
     def setup_canvas(self):
         super().setup_canvas()
-        self.subscribe_all()
+        if getattr(self.canvas, "watching", True):
+            self.subscribe_all()
 
     def teardown_canvas(self):
         self.unsubscribe_all()
@@ -24,7 +24,14 @@ methods:
     save(save_func):  send the value of the property to save_func(name, value)
 """
 
-__all__ = ["attribute", "enumeration", "association", "derivedunion", "redefine"]
+__all__ = [
+    "attribute",
+    "enumeration",
+    "association",
+    "derivedunion",
+    "redefine",
+    "memoized",
+]
 
 import logging
 
@@ -48,6 +55,10 @@ from gaphor.UML.event import (
 
 log = logging.getLogger(__name__)
 
+# While a memoized property is computing its value, the (element, property)
+# pairs that are read are recorded in the topmost set of this stack.
+_memo_readers = []
+
 
 class umlproperty:
     """
@@ -67,6 +78,8 @@ class umlproperty:
 
     def __get__(self, obj, class_=None):
         if obj:
+            if _memo_readers:
+                _memo_readers[-1].add((obj, self))
             return self._get(obj)
         return self
 
@@ -93,11 +106,27 @@ class umlproperty:
         pass
 
     def handle(self, event):
+        _drop_memos(event.element, event.property)
         event.element.handle(event)
         for d in self._dependent_properties:
             d.propagate(event)
 
 
+def _drop_memos(element, prop):
+    """
+    Drop the memoized values that depend on property `prop` of `element`,
+    including the ones that depend on properties derived from `prop`.
+    """
+    try:
+        watchers = element._memo_watchers
+    except AttributeError:
+        return
+    for owner, memo in watchers.pop(prop, ()):
+        memo.invalidate(owner)
+    for d in prop._dependent_properties:
+        _drop_memos(element, d)
+
+
 class attribute(umlproperty):
     """
     Attribute.
@@ -347,7 +376,7 @@ class association(umlproperty):
             elif value in c:
                 return
 
-            c.items.append(value)
+            c._add(value)
             if do_notify:
                 event = AssociationAddEvent(obj, self, value)
 
@@ -396,22 +425,39 @@ class association(umlproperty):
         else:
             c = self._get(obj)
             if c:
-                items = c.items
                 try:
-                    items.remove(value)
-                except:
+                    c._remove(value)
+                except KeyError:
                     pass
                 else:
                     if do_notify:
                         event = AssociationDeleteEvent(obj, self, value)
 
                 # Remove items collection if empty
-                if not items:
+                if not c:
                     delattr(obj, self._name)
 
         if do_notify and event:
             self.handle(event)
 
+    def referrers(self, obj):
+        """
+        Return the elements that refer to ``obj`` through this association.
+
+        For bi-directional associations this is the value of the opposite
+        property. Uni-directional associations keep track of the referring
+        elements in their association stub. Either way, no search is needed.
+        """
+        if self.opposite:
+            opposite = getattr(type(obj), self.opposite)
+            values = opposite._get(obj)
+            if opposite.upper == 1:
+                return [values] if values else []
+            return list(values)
+        elif self.stub:
+            return list(getattr(obj, self.stub._name, ()))
+        return []
+
     def unlink(self, obj):
         values = self._get(obj)
         composite = self.composite
@@ -466,14 +512,15 @@ class associationstub(umlproperty):
         except AttributeError:
             pass
         else:
-            for value in set(values):
+            for value in list(values):
                 self.association.__delete__(value, obj)
 
     def _set(self, obj, value):
+        # A dict is used as an insertion ordered set
         try:
-            getattr(obj, self._name).add(value)
+            getattr(obj, self._name)[value] = None
         except AttributeError:
-            setattr(obj, self._name, {value})
+            setattr(obj, self._name, {value: None})
 
     def _del(self, obj, value, from_opposite=False):
         try:
@@ -481,7 +528,7 @@ class associationstub(umlproperty):
         except AttributeError:
             pass
         else:
-            c.discard(value)
+            c.pop(value, None)
 
 
 class unioncache:
@@ -526,11 +573,32 @@ class derived(umlproperty):
         )
 
     def postload(self, obj):
-        self.version += 1
+        self.invalidate(obj)
 
     def save(self, obj, save_func):
         pass
 
+    def invalidate(self, obj):
+        """
+        Make sure the value is computed again for `obj`.
+
+        Cached values are kept per element, so only the cache of `obj` is
+        dropped. If `obj` does not own this property, the changed subset is
+        defined on another type of element (e.g. ``Property.type`` for
+        ``Association.endType``). We can not tell which elements are affected
+        in that case, so the version is raised, invalidating all caches.
+        """
+        prop = getattr(type(obj), self.name, None)
+        while isinstance(prop, redefine):
+            prop = prop.original
+        if prop is self:
+            try:
+                delattr(obj, self._name)
+            except AttributeError:
+                pass
+        else:
+            self.version += 1
+
     def __str__(self):
         return f"<derived {self.name}: {str(list(map(str, self.subsets)))[1:-1]}>"
 
@@ -593,7 +661,7 @@ class derived(umlproperty):
         """
         if event.property in self.subsets:
             # Make sure unions are created again
-            self.version += 1
+            self.invalidate(event.element)
 
             if not isinstance(event, AssociationChangeEvent):
                 return
@@ -682,7 +750,7 @@ class derivedunion(derived):
         """
         if event.property in self.subsets:
             # Make sure unions are created again
-            self.version += 1
+            self.invalidate(event.element)
 
             if not isinstance(event, AssociationChangeEvent):
                 return
@@ -829,3 +897,98 @@ class redefine(umlproperty):
                     + str(event)
                     + " for redefined association"
                 )
+
+
+class memoized(umlproperty):
+    """
+    A computed property, of which the value is memoized per element.
+
+      NamedElement.qualifiedName = memoized('qualifiedName', func)
+
+    While `func` computes the value, the UML properties it reads are
+    recorded, on whichever element they are read. The memo is dropped as
+    soon as one of those properties changes value (i.e. sends an event), and
+    so are the memos that depend on this memo in turn. Memos of elements that
+    are not affected by a change are kept.
+
+    The value should not be changed by the caller, hence it's best to return
+    a tuple rather than a list or set.
+    """
+
+    def __init__(self, name, func, doc=None):
+        super().__init__()
+        self.name = name
+        self._name = "_" + name
+        self.func = func
+        self.__doc__ = doc or func.__doc__
+
+    def load(self, obj, value):
+        raise ValueError(
+            "Memoized: Properties should not be loaded in a memoized property %s: %s"
+            % (self.name, value)
+        )
+
+    def postload(self, obj):
+        # Loading does not send events
+        self.invalidate(obj)
+
+    def save(self, obj, save_func):
+        pass
+
+    def unlink(self, obj):
+        self.invalidate(obj)
+
+    def __str__(self):
+        return f"<memoized {self.name}>"
+
+    def _get(self, obj):
+        try:
+            return getattr(obj, self._name)[0]
+        except AttributeError:
+            pass
+
+        reads = set()
+        _memo_readers.append(reads)
+        try:
+            value = self.func(obj)
+        finally:
+            _memo_readers.pop()
+
+        for element, prop in reads:
+            try:
+                watchers = element._memo_watchers
+            except AttributeError:
+                watchers = element._memo_watchers = {}
+            try:
+                watchers[prop].add((obj, self))
+            except KeyError:
+                watchers[prop] = {(obj, self)}
+
+        setattr(obj, self._name, (value, reads))
+        return value
+
+    def _set(self, obj, value):
+        raise AttributeError("Can not set values on a memoized property")
+
+    def _del(self, obj, value=None):
+        raise AttributeError("Can not delete values on a memoized property")
+
+    def invalidate(self, obj):
+        """
+        Drop the memoized value of `obj`, so it will be computed again
+        the next time it's requested.
+        """
+        try:
+            value, reads = getattr(obj, self._name)
+        except AttributeError:
+            return
+        delattr(obj, self._name)
+
+        for element, prop in reads:
+            watchers = element._memo_watchers
+            owners = watchers.get(prop)
+            if owners:
+                owners.discard((obj, self))
+                if not owners:
+                    del watchers[prop]
+        _drop_memos(obj, self)
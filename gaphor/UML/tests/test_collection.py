@@ -2,7 +2,13 @@
 Test if the collection's list supports all trickery.
 """
 
+import time
+
+import pytest
+
 from gaphor.UML.collection import collectionlist
+from gaphor.UML.element import Element
+from gaphor.UML.properties import association, attribute
 
 
 def test_listing():
@@ -11,3 +17,116 @@ def test_listing():
     c.append("b")
     c.append("c")
     assert str(c) == "['a', 'b', 'c']"
+
+
+class A(Element):
+    pass
+
+
+class B(Element):
+    pass
+
+
+A.many = association("many", B, 0, "*", opposite="one")
+B.one = association("one", A, 0, 1, opposite="many")
+B.name = attribute("name", str)
+
+
+def create(n):
+    a = A()
+    bs = [B() for _ in range(n)]
+    for i, b in enumerate(bs):
+        b.name = str(i)
+        a.many = b
+    return a, bs
+
+
+def test_collection_keeps_order():
+    a, bs = create(5)
+
+    assert list(a.many) == bs
+    assert a.many[1] is bs[1]
+    assert a.many[1:3] == bs[1:3]
+    assert a.many.index(bs[3]) == 3
+
+
+def test_collection_recursion_and_query():
+    a, bs = create(5)
+
+    assert list(a.many[:].name) == ["0", "1", "2", "3", "4"]
+    assert a.many['it.name=="3"', 0] is bs[3]
+
+
+def test_collection_remove():
+    a, bs = create(5)
+
+    a.many.remove(bs[1])
+
+    assert list(a.many) == [bs[0], bs[2], bs[3], bs[4]]
+    assert bs[1] not in a.many
+    assert bs[1].one is None
+    assert a.many.index(bs[2]) == 1
+    with pytest.raises(ValueError):
+        a.many.remove(bs[1])
+
+
+def test_collection_add_after_index_access():
+    a, bs = create(2)
+    assert a.many[1] is bs[1]
+
+    b = B()
+    a.many = b
+
+    assert a.many[2] is b
+    assert len(a.many) == 3
+
+
+def test_collection_swap():
+    a, bs = create(3)
+
+    assert a.many.swap(bs[0], bs[2])
+
+    assert list(a.many) == [bs[2], bs[1], bs[0]]
+    assert bs[0] in a.many
+    assert not a.many.swap(bs[0], B())
+
+
+def test_collection_iterate_while_removing():
+    a, bs = create(5)
+
+    for b in a.many:
+        del b.one
+
+    assert not a.many
+    assert len(a.many) == 0
+
+
+def collection_timings(n):
+    a = A()
+    bs = [B() for _ in range(n)]
+
+    start = time.perf_counter()
+    for b in bs:
+        a.many = b
+    added = time.perf_counter()
+    for b in bs:
+        assert a.many.includes(b)
+    checked = time.perf_counter()
+    for b in reversed(bs):
+        a.many.remove(b)
+    removed = time.perf_counter()
+
+    return added - start, checked - added, removed - checked
+
+
+@pytest.mark.benchmark
+def test_collection_operations_are_constant_time():
+    """Microbenchmark on 10k member collections: doubling the collection
+    size should (about) double the time needed to add, find and remove all
+    members. For linear operations it would take four times as long.
+    """
+    t10k = collection_timings(10000)
+    t20k = collection_timings(20000)
+
+    for small, large in zip(t10k, t20k):
+        assert large < small * 3.5, (t10k, t20k)
@@ -155,6 +155,41 @@ def test_notification(
     assert len(dispatcher._handlers) == 2
 
 
+def test_compiled_paths_are_cached(dispatcher, uml_class, element_factory):
+    other_class = element_factory.create(UML.Class)
+    path = "ownedOperation.parameter.name"
+
+    props = dispatcher._path_to_properties(uml_class, path)
+
+    assert props == (
+        UML.Class.ownedOperation,
+        UML.Operation.parameter,
+        UML.Parameter.name,
+    )
+    assert dispatcher._path_to_properties(other_class, path) is props
+
+
+def test_rewiring_does_not_grow_reverse_table(
+    dispatcher, uml_class, event, element_factory
+):
+    element = uml_class
+    dispatcher.subscribe(event.handler, element, "ownedOperation.parameter.name")
+    n_keys = len(dispatcher._reverse[event.handler])
+
+    for _ in range(10):
+        o = element_factory.create(UML.Operation)
+        element.ownedOperation = o
+        o.formalParameter = element_factory.create(UML.Parameter)
+        del element.ownedOperation[o]
+
+    assert n_keys == len(dispatcher._reverse[event.handler])
+
+    dispatcher.unsubscribe(event.handler)
+
+    assert not dispatcher._handlers
+    assert not dispatcher._reverse
+
+
 def test_notification_2(
     dispatcher, uml_transition, uml_constraint, event, element_factory
 ):
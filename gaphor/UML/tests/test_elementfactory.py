@@ -132,3 +132,72 @@ def test_no_create_events_when_blocked(element_factory):
     with element_factory.block_events():
         element_factory.create(Parameter)
     assert events == [], events
+
+
+def test_select_type(factory):
+    p = factory.create(Package)
+    c1 = factory.create(Class)
+    c2 = factory.create(Class)
+    s = factory.create(Stereotype)
+    factory.create(Parameter)
+
+    assert list(factory.select_type(Package)) == [p]
+    assert list(factory.select_type(Class)) == [c1, c2, s]
+    assert set(factory.select_type(Classifier)) == {c1, c2, s}
+    assert set(factory.select_type(Element)) == set(factory.select())
+
+
+def test_select_type_with_expression(factory):
+    c1 = factory.create(Class)
+    c2 = factory.create(Class)
+    c2.name = "Two"
+
+    assert list(factory.select_type(Class, lambda e: e.name == "Two")) == [c2]
+
+
+def test_select_type_after_unlink_and_bind(factory):
+    c1 = factory.create(Class)
+    c2 = factory.create(Class)
+
+    c1.unlink()
+    assert list(factory.select_type(Class)) == [c2]
+
+    c3 = Class()
+    factory.bind(c3)
+    assert list(factory.select_type(Class)) == [c2, c3]
+
+    factory.flush()
+    assert list(factory.select_type(Class)) == []
+
+
+def test_dirty_elements(factory):
+    p = factory.create(Package)
+    c = factory.create(Class)
+    factory.clear_dirty()
+    assert factory.dirty() == ([], set())
+
+    c.name = "Foo"
+    assert factory.dirty() == ([c], set())
+
+    c.package = p
+    assert set(factory.dirty()[0]) == {c, p}
+
+    factory.clear_dirty()
+    c.unlink()
+    assert factory.dirty() == ([p], {c.id})
+
+
+def test_loaded_model_is_not_dirty(factory):
+    p = factory.create_as(Package, "1")
+    factory.notify_model()
+
+    assert factory.dirty() == ([], set())
+
+
+def test_dirty_version_changes(factory):
+    c = factory.create(Class)
+    version = factory.dirty_version
+
+    c.name = "Foo"
+
+    assert factory.dirty_version != version
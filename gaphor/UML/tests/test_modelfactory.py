@@ -138,6 +138,26 @@ def test_finding_stereotype_instances(factory):
     assert "s2" not in result, result
 
 
+def test_finding_stereotype_instances_after_removal(factory):
+    s1 = factory.create(UML.Stereotype)
+    c1 = factory.create(UML.Class)
+    c2 = factory.create(UML.Class)
+    obj1 = UML.model.apply_stereotype(c1, s1)
+    obj2 = UML.model.apply_stereotype(c2, s1)
+
+    UML.model.remove_stereotype(c1, s1)
+
+    assert [obj2] == list(UML.model.find_instances(s1))
+
+
+def test_finding_stereotype_instances_keeps_creation_order(factory):
+    s1 = factory.create(UML.Stereotype)
+    classes = [factory.create(UML.Class) for _ in range(10)]
+    instances = [UML.model.apply_stereotype(c, s1) for c in classes]
+
+    assert instances == list(UML.model.find_instances(s1))
+
+
 # Association tests
 
 
@@ -758,3 +758,101 @@ def test_redefine_subclass():
         assert events[1].property is B.b.original, events[1].property
     finally:
         Application.unregister_handler(handler)
+
+
+def test_umlproperties_registry():
+    class A(Element):
+        pass
+
+    class B(A):
+        pass
+
+    A.a = attribute("a", str)
+    assert tuple(B().umlproperties()) == (A.a,)
+
+    # Properties added later on are picked up by the class and subclasses
+    B.b = attribute("b", str)
+    A.c = association("c", A, 0, 1)
+    assert set(A().umlproperties()) == {A.a, A.c}
+    assert set(B().umlproperties()) == {A.a, B.b, A.c}
+
+    # The registry is used, instead of scanning the class again
+    assert A.umlproperties_of() is A.umlproperties_of()
+
+    del B.b
+    assert set(B().umlproperties()) == {A.a, A.c}
+
+
+def test_umlproperties_registry_association_stub():
+    class A(Element):
+        pass
+
+    class C(Element):
+        pass
+
+    A.one = association("one", C, 0, 1)
+    assert tuple(C().umlproperties()) == ()
+
+    # The association stub is a property that is added on the fly
+    a = A()
+    c = C()
+    a.one = c
+    assert tuple(C().umlproperties()) == (A.one.stub,)
+
+    c.unlink()
+    assert a.one is None
+
+
+def test_memoized():
+    class A(Element):
+        pass
+
+    calls = []
+
+    def a_label(self):
+        calls.append(self)
+        return (self.name, self.other and self.other.label)
+
+    A.name = attribute("name", str)
+    A.other = association("other", A, 0, 1)
+    A.label = memoized("label", a_label)
+
+    a1 = A()
+    a2 = A()
+    a1.name = "a1"
+    a2.name = "a2"
+    a1.other = a2
+
+    assert a1.label == ("a1", ("a2", None))
+    assert a1.label == ("a1", ("a2", None))
+    assert calls == [a1, a2]
+
+    # Changing an unrelated element leaves the memo alone
+    A().name = "a3"
+    assert a1.label == ("a1", ("a2", None))
+    assert len(calls) == 2
+
+    # Memos depending on another memo are dropped as well
+    a2.name = "b2"
+    assert a1.label == ("a1", ("b2", None))
+    assert calls == [a1, a2, a1, a2]
+
+    del a1.other
+    assert a1.label == ("a1", None)
+    assert len(calls) == 5
+
+    # a1 no longer depends on a2
+    a2.name = "c2"
+    assert a1.label == ("a1", None)
+    assert len(calls) == 5
+    assert not a2._memo_watchers
+
+
+def test_memoized_can_not_be_set():
+    class A(Element):
+        pass
+
+    A.label = memoized("label", lambda self: "label")
+
+    with pytest.raises(AttributeError):
+        A().label = "other"
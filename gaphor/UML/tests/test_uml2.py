@@ -279,6 +279,59 @@ def test_namedelement_qualifiedname(factory):
     assert ("Package", "Class") == c.qualifiedName
 
 
+def test_namedelement_qualifiedname_follows_changes(factory):
+    p = factory.create(UML.Package)
+    p.name = "Package"
+    sub = factory.create(UML.Package)
+    sub.name = "Sub"
+    sub.package = p
+    c = factory.create(UML.Class)
+    c.name = "Class"
+    c.package = sub
+
+    assert ("Package", "Sub", "Class") == c.qualifiedName
+
+    p.name = "Root"
+    assert ("Root", "Sub", "Class") == c.qualifiedName
+
+    c.package = p
+    assert ("Root", "Class") == c.qualifiedName
+
+    sub.name = "Other"
+    c.name = "Renamed"
+    assert ("Root", "Renamed") == c.qualifiedName
+    assert ("Root", "Other") == sub.qualifiedName
+
+
+def test_component_provided_and_required_follow_changes(factory):
+    c = factory.create(UML.Component)
+    i1 = factory.create(UML.Interface)
+    i2 = factory.create(UML.Interface)
+
+    assert () == c.provided
+    assert () == c.required
+
+    impl = factory.create(UML.Implementation)
+    impl.contract = i1
+    impl.implementatingClassifier = c
+    assert (i1,) == c.provided
+
+    realizing = factory.create(UML.Class)
+    realization = factory.create(UML.Realization)
+    realization.realizingClassifier = realizing
+    c.realization = realization
+    usage = factory.create(UML.Usage)
+    usage.client = realizing
+    usage.supplier = i2
+    assert (i2,) == c.required
+
+    realization.realizingClassifier = factory.create(UML.Class)
+    assert () == c.required
+
+    impl.unlink()
+    assert () == c.provided
+
+
 def test_extension_metaclass(factory):
     c = factory.create(UML.Class)
     c.name = "Class"
@@ -307,6 +360,31 @@ def test_metaclass_extension(factory):
     assert e.ownedEnd.type is s
 
 
+def test_metaclass_extension_follows_changes(factory):
+    c = factory.create(UML.Class)
+    c2 = factory.create(UML.Class)
+    s = factory.create(UML.Stereotype)
+
+    e = UML.model.create_extension(c, s)
+    metaend = [end for end in e.memberEnd if end is not e.ownedEnd][0]
+
+    metaend.type = c2
+    assert [] == c.extension
+    assert [e] == c2.extension
+
+    e.unlink()
+    assert [] == c2.extension
+
+
+def test_metaclass_extension_keeps_creation_order(factory):
+    c = factory.create(UML.Class)
+    stereotypes = [factory.create(UML.Stereotype) for _ in range(10)]
+
+    extensions = [UML.model.create_extension(c, s) for s in stereotypes]
+
+    assert extensions == c.extension
+
+
 def test_operation_parameter_deletion(factory):
     assert 0 == len(factory.lselect())
 
@@ -319,3 +397,76 @@ def test_operation_parameter_deletion(factory):
     c.unlink()
 
     assert 0 == len(factory.lselect()), factory.lselect()
+
+
+def test_derived_union_is_invalidated_per_element():
+    p1 = UML.Package()
+    p2 = UML.Package()
+    c1 = UML.Class()
+    c1.package = p1
+
+    assert [c1] == list(p1.ownedMember)
+    assert [] == list(p2.ownedMember)
+    version = UML.Namespace.ownedMember.version
+
+    c2 = UML.Class()
+    c2.package = p2
+
+    assert version == UML.Namespace.ownedMember.version
+    assert [c1] == list(p1.ownedMember)
+    assert [c2] == list(p2.ownedMember)
+
+
+def test_derived_is_invalidated_by_other_element():
+    a = UML.Association()
+    p = UML.Property()
+    c = UML.Class()
+    a.memberEnd = p
+
+    assert [None] == a.endType
+
+    p.type = c
+
+    assert [c] == a.endType
+
+
+def union_hit_rate(factory, monkeypatch, invalidate_all):
+    """Simulate a tree refresh: after each edit the members of all
+    packages are requested. Return the fraction of reads that hit the
+    cached union.
+    """
+    ownedMember = UML.Namespace.ownedMember
+    packages = [factory.create(UML.Package) for _ in range(100)]
+    for p in packages:
+        for _ in range(10):
+            factory.create(UML.Class).package = p
+
+    misses = 0
+    update = ownedMember._update
+
+    def counting_update(obj):
+        nonlocal misses
+        misses += 1
+        return update(obj)
+
+    monkeypatch.setattr(ownedMember, "_update", counting_update)
+
+    reads = 0
+    for p in packages:
+        factory.create(UML.Class).package = p
+        if invalidate_all:
+            # Behaviour of a global version counter
+            ownedMember.version += 1
+        for q in packages:
+            q.ownedMember
+            reads += 1
+
+    return 1 - misses / reads
+
+
+def test_derived_union_hit_rate(factory, monkeypatch):
+    global_hit_rate = union_hit_rate(factory, monkeypatch, invalidate_all=True)
+    hit_rate = union_hit_rate(factory, monkeypatch, invalidate_all=False)
+
+    assert global_hit_rate < 0.05
+    assert hit_rate > 0.95
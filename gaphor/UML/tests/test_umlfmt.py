@@ -7,7 +7,7 @@ import pytest
 from gaphor.application import Application
 from gaphor.services.eventmanager import EventManager
 from gaphor.UML.elementfactory import ElementFactory
-from gaphor.UML.umlfmt import format
+from gaphor.UML.umlfmt import format, format_cache
 import gaphor.UML.uml2 as UML
 
 
@@ -26,3 +26,101 @@ def test_simple_format(factory):
 
     a.typeValue = "int"
     assert "+ myattr: int" == format(a)
+
+
+def test_format_is_cached(factory):
+    a = factory.create(UML.Property)
+    a.name = "myattr"
+    format_cache.clear()
+
+    assert "+ myattr" == format(a)
+    assert "+ myattr" == format(a)
+    assert "myattr" == format(a, visibility=False, type=True)
+
+    assert format_cache.hits == 1
+    assert format_cache.misses == 2
+    assert format_cache.hit_rate == pytest.approx(1 / 3)
+
+
+def test_format_cache_is_invalidated_by_parameter_change(factory):
+    o = factory.create(UML.Operation)
+    o.name = "method"
+    p = factory.create(UML.Parameter)
+    p.name = "param"
+    o.formalParameter = p
+    assert "+ method(in param)" == format(o)
+
+    p.typeValue = "str"
+
+    assert "+ method(in param: str)" == format(o)
+
+
+def test_format_cache_is_invalidated_by_slot_change(factory):
+    a = factory.create(UML.Property)
+    a.name = "myattr"
+    stereotype_attr = factory.create(UML.Property)
+    stereotype_attr.name = "tag"
+    instance = factory.create(UML.InstanceSpecification)
+    slot = factory.create(UML.Slot)
+    slot.definingFeature = stereotype_attr
+    slot.value = "1"
+    instance.slot = slot
+    a.appliedStereotype = instance
+    assert "+ myattr { tag=1 }" == format(a, visibility=True, tags=True)
+
+    slot.value = "2"
+    assert "+ myattr { tag=2 }" == format(a, visibility=True, tags=True)
+
+    stereotype_attr.name = "other"
+    assert "+ myattr { other=2 }" == format(a, visibility=True, tags=True)
+
+
+def test_format_cache_is_invalidated_without_event_manager():
+    factory = ElementFactory()
+    a = factory.create(UML.Property)
+    a.name = "myattr"
+    assert "+ myattr" == format(a)
+
+    a.name = "other"
+
+    assert "+ other" == format(a)
+
+
+def test_format_in_element_dispatcher_handler(factory):
+    a = factory.create(UML.Property)
+    a.name = "myattr"
+    assert "+ myattr" == format(a)
+    formatted = []
+
+    def handler(event):
+        formatted.append(format(a))
+
+    factory.element_dispatcher.subscribe(handler, a, "name")
+    a.name = "other"
+
+    assert formatted == ["+ other"]
+
+
+def test_format_in_event_batch(factory):
+    a = factory.create(UML.Property)
+    a.name = "myattr"
+    assert "+ myattr" == format(a)
+
+    with factory.event_manager.batch():
+        a.name = "other"
+
+        assert "+ other" == format(a)
+
+
+def test_register_format():
+    class Custom(UML.NamedElement):
+        pass
+
+    @format.register(Custom)
+    def format_custom(el):
+        return f"<{el.name}>"
+
+    el = Custom()
+    el.name = "custom"
+
+    assert "<custom>" == format(el)
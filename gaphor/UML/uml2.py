@@ -7,6 +7,7 @@ from gaphor.UML.properties import (
     derived,
     derivedunion,
     redefine,
+    memoized,
 )
 
 # class 'ValueSpecification' has been stereotyped as 'SimpleAttribute'
@@ -570,9 +571,7 @@ def namedelement_qualifiedname(self):
         return (self.name,)
 
 
-NamedElement.qualifiedName = property(
-    namedelement_qualifiedname, doc=namedelement_qualifiedname.__doc__
-)
+NamedElement.qualifiedName = memoized("qualifiedName", namedelement_qualifiedname)
 
 del namedelement_qualifiedname
 Component.isIndirectlyInstantiated = attribute(
@@ -599,7 +598,7 @@ Property.aggregation = enumeration(
 Property.isDerivedUnion = attribute("isDerivedUnion", int, default=False)
 Property.isDerived = attribute("isDerived", int, default=False)
 Property.isReadOnly = attribute("isReadOnly", int, default=False)
-# 140: override Property.navigability
+# 143: override Property.navigability
 
 
 def property_navigability(self):
@@ -635,7 +634,7 @@ Comment.body = attribute("body", str)
 PackageImport.visibility = enumeration(
     "visibility", ("public", "private", "package", "protected"), "public"
 )
-# 245: override Message.messageKind
+# 248: override Message.messageKind
 
 
 def message_messageKind(self):
@@ -1153,7 +1152,7 @@ MultiplicityElement.upper = derived(
 )
 MultiplicityElement.upper.filter = lambda obj: [obj.upperValue]
 # MultiplicityElement.upper = MultiplicityElement.upperValue
-# 132: override Property.isComposite derives Property.aggregation
+# 135: override Property.isComposite derives Property.aggregation
 # Property.isComposite = property(lambda self: self.aggregation == 'composite')
 Property.isComposite = derivedunion("isComposite", bool, 0, 1, Property.aggregation)
 Property.isComposite.filter = lambda obj: [obj.aggregation == "composite"]
@@ -1208,7 +1207,7 @@ Feature.featuringClassifier = derivedunion(
     Property.datatype,
     Operation.interface_,
 )
-# 111: override Property.opposite
+# 114: override Property.opposite
 
 
 def property_opposite(self):
@@ -1322,7 +1321,7 @@ Namespace.ownedMember = derivedunion(
     Class.ownedReception,
     Interface.ownedReception,
 )
-# 96: override Classifier.general
+# 99: override Classifier.general
 def classifier_general(self):
     return [g.general for g in self.generalization]
 
@@ -1356,11 +1355,11 @@ Classifier.attribute = derivedunion(
     Actor.ownedAttribute,
     Signal.ownedAttribute,
 )
-# 137: override Constraint.context
+# 140: override Constraint.context
 Constraint.context = derivedunion("context", Namespace, 0, 1)
-# 165: override Operation.type
+# 168: override Operation.type
 Operation.type = derivedunion("type", DataType, 0, 1)
-# 76: override Extension.metaclass derives Extension.ownedEnd Association.memberEnd
+# 79: override Extension.metaclass derives Extension.ownedEnd Association.memberEnd
 # See https://www.omg.org/spec/UML/2.5/PDF, section 12.4.1.5, page 271
 def extension_metaclass(self):
     ownedEnd = self.ownedEnd
@@ -1382,10 +1381,11 @@ del extension_metaclass
 # 60: override Class.extension derives Extension.metaclass
 # See https://www.omg.org/spec/UML/2.5/PDF, section 11.8.3.6, page 219
 # It defines `Extension.allInstances()`, which basically means we have to query the element factory.
+# Instead, the properties typed by this class are looked up through the
+# association stub of the (uni-directional) TypedElement.type association.
 def class_extension(self):
-    return list(
-        self.model.select(lambda e: e.isKindOf(Extension) and self is e.metaclass)
-    )
+    extensions = dict.fromkeys(p.association for p in TypedElement.type.referrers(self))
+    return [e for e in extensions if isinstance(e, Extension) and self is e.metaclass]
 
 
 # TODO: use those as soon as Extension.metaclass can be used.
@@ -1440,7 +1440,7 @@ ActivityGroup.superGroup = derivedunion("superGroup", ActivityGroup, 0, 1)
 ActivityGroup.subgroup = derivedunion(
     "subgroup", ActivityGroup, 0, "*", ActivityPartition.subpartition
 )
-# 93: override Classifier.inheritedMember
+# 96: override Classifier.inheritedMember
 Classifier.inheritedMember = derivedunion("inheritedMember", NamedElement, 0, "*")
 StructuredClassifier.role = derivedunion(
     "role",
@@ -1461,7 +1461,7 @@ Namespace.member = derivedunion(
     Classifier.inheritedMember,
     StructuredClassifier.role,
 )
-# 230: override Component.required
+# 233: override Component.required
 def component_required(self):
     usages = _pr_interface_deps(self, Usage)
 
@@ -1472,17 +1472,18 @@ def component_required(self):
     return tuple(set(itertools.chain(usages, *rc_usages)))
 
 
-Component.required = property(
+Component.required = memoized(
+    "required",
     component_required,
     doc="""
     Interfaces required by component.
     """,
 )
 del component_required
-# 108: override Namespace.importedMember
+# 111: override Namespace.importedMember
 Namespace.importedMember = derivedunion("importedMember", PackageableElement, 0, "*")
 Action.input = derivedunion("input", InputPin, 0, "*", SendSignalAction.target)
-# 194: override Component.provided
+# 197: override Component.provided
 import itertools
 
 
@@ -1527,14 +1528,15 @@ def component_provided(self):
     return tuple(set(itertools.chain(implementations, realizations, *rc_realizations)))
 
 
-Component.provided = property(
+Component.provided = memoized(
+    "provided",
     component_provided,
     doc="""
     Interfaces provided to component environment.
     """,
 )
 del component_provided
-# 93: override Classifier.inheritedMember
+# 96: override Classifier.inheritedMember
 Classifier.inheritedMember = derivedunion("inheritedMember", NamedElement, 0, "*")
 Element.owner = derivedunion(
     "owner",
@@ -1593,7 +1595,7 @@ StructuredClassifier.role = derivedunion(
     Collaboration.collaborationRole,
 )
 ConnectorEnd.definingEnd = derivedunion("definingEnd", Property, 0, 1)
-# 264: override StructuredClassifier.part
+# 267: override StructuredClassifier.part
 def structuredclassifier_part(self):
     return tuple(a for a in self.ownedAttribute if a.isComposite)
 
@@ -1606,7 +1608,7 @@ StructuredClassifier.part = property(
 )
 del structuredclassifier_part
 Transition.redefintionContext = derivedunion("redefintionContext", Classifier, 1, 1)
-# 105: override Class.superClass
+# 108: override Class.superClass
 Class.superClass = Classifier.general
 ActivityNode.redefinedElement = redefine(
     ActivityNode, "redefinedElement", ActivityNode, RedefinableElement.redefinedElement
@@ -1647,12 +1649,12 @@ State.redefinedState = redefine(
 Transition.redefinedTransition = redefine(
     Transition, "redefinedTransition", Transition, RedefinableElement.redefinedElement
 )
-# 168: override Lifeline.parse
+# 171: override Lifeline.parse
 from gaphor.UML.umllex import parse_lifeline
 
 Lifeline.parse = parse_lifeline
 del parse_lifeline
-# 173: override Lifeline.render
+# 176: override Lifeline.render
 from gaphor.UML.umllex import render_lifeline
 
 Lifeline.render = render_lifeline
@@ -1,25 +1,132 @@
 """
 Formatting of UML elements like attributes, operations, stereotypes, etc.
+
+Formatted strings are memoized per element and format options. The cache
+entries of an element are invalidated when the element, or an element its
+format depends on (like the parameters of an operation), changes.
 """
 
 import io
 import re
+import weakref
 
 from functools import singledispatch
 
 from gaphor.UML import uml2 as UML
+from gaphor.UML.elementfactory import register_change_hook
 
 
-@singledispatch
-def format(el):
+class FormatCache:
+    """
+    Formatted strings, by element and format options.
+
+    The element factory invalidates the entries of an element when the
+    element is changed or deleted, before any event handler is called.
+    Elements that are not part of a model do not notify a factory, and are
+    not cached.
+
+    The ``hits`` and ``misses`` counters tell how well the cache is doing.
+    """
+
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()
+        self._dependents = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def format(self, el, options, formatter):
+        """
+        Return the cached format of element `el` for `options`, or format
+        the element with `formatter()`.
+        """
+        try:
+            value = self._entries[el][options]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = formatter()
+        self._entries.setdefault(el, {})[options] = value
+        for dependency in format_dependencies(el):
+            self._dependents.setdefault(dependency, weakref.WeakSet()).add(el)
+        return value
+
+    def invalidate(self, el):
+        """
+        Forget the formats of `el` and of the elements depending on it.
+        """
+        self._entries.pop(el, None)
+        for dependent in self._dependents.pop(el, ()):
+            self.invalidate(dependent)
+
+    def clear(self):
+        self._entries.clear()
+        self._dependents.clear()
+        self.hits = self.misses = 0
+
+
+format_cache = FormatCache()
+register_change_hook(format_cache.invalidate)
+
+
+def format(el, *args, **kwargs):
     """
     Format an UML element.
     """
+    if getattr(el, "model", None) is None:
+        return _format(el, *args, **kwargs)
+    return format_cache.format(
+        el, (args, tuple(kwargs.items())), lambda: _format(el, *args, **kwargs)
+    )
+
+
+@singledispatch
+def _format(el):
     raise NotImplementedError(
         "Format routine for type %s not implemented yet" % type(el)
     )
 
 
+format.register = _format.register
+
+
+@singledispatch
+def format_dependencies(el):
+    """
+    The elements, other than `el`, that are used to format `el`.
+    """
+    return ()
+
+
+@format_dependencies.register(UML.Property)
+def _property_dependencies(el):
+    instances = el.appliedStereotype
+    slots = [slot for slot in instances[:].slot if slot]
+    return [
+        *instances,
+        *slots,
+        *(slot.definingFeature for slot in slots if slot.definingFeature),
+    ]
+
+
+@format_dependencies.register(UML.Operation)
+def _operation_dependencies(el):
+    return [*el.formalParameter, *el.returnResult]
+
+
+@format_dependencies.register(UML.Slot)
+def _slot_dependencies(el):
+    return [el.definingFeature] if el.definingFeature else []
+
+
 @format.register(UML.Property)
 def format_property(el, *args, **kwargs):
     """
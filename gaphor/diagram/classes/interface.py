@@ -82,7 +82,14 @@ from gaphor.diagram.presentation import (
     Classified,
     from_package_str,
 )
-from gaphor.diagram.shapes import Box, IconBox, EditableText, Text, draw_border
+from gaphor.diagram.shapes import (
+    Box,
+    IconBox,
+    EditableText,
+    ShapeCache,
+    Text,
+    draw_border,
+)
 from gaphor.diagram.text import FontWeight, VerticalAlign
 from gaphor.diagram.support import represents
 
@@ -155,6 +162,7 @@ class InterfaceItem(ElementPresentation, Classified):
 
     def __init__(self, id=None, model=None):
         super().__init__(id, model)
+        self._compartment_shapes = ShapeCache()
         self._folded = Folded.NONE
         self.angle = 0
 
@@ -297,6 +305,7 @@ class InterfaceItem(ElementPresentation, Classified):
     )
 
     def update_shapes(self, event=None):
+        shapes = self._compartment_shapes
         if self._folded == Folded.NONE:
             self.shape = Box(
                 Box(
@@ -319,13 +328,13 @@ class InterfaceItem(ElementPresentation, Classified):
                 *(
                     self.show_attributes
                     and self.subject
-                    and [attributes_compartment(self.subject)]
+                    and [attributes_compartment(self.subject, shapes)]
                     or []
                 ),
                 *(
                     self.show_operations
                     and self.subject
-                    and [operations_compartment(self.subject)]
+                    and [operations_compartment(self.subject, shapes)]
                     or []
                 ),
                 *(
@@ -355,6 +364,7 @@ class InterfaceItem(ElementPresentation, Classified):
                     style={"font-weight": FontWeight.BOLD},
                 ),
             )
+        shapes.sweep()
 
     def draw_interface_ball_and_socket(self, _box, context, _bounding_box):
         cr = context.cairo
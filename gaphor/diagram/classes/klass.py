@@ -8,6 +8,7 @@ from gaphor.diagram.presentation import (
 from gaphor.diagram.shapes import (
     Box,
     EditableText,
+    ShapeCache,
     Text,
     draw_border,
     draw_top_separator,
@@ -38,6 +39,7 @@ class ClassItem(ElementPresentation, Classified):
 
     def __init__(self, id=None, model=None):
         super().__init__(id, model)
+        self._compartment_shapes = ShapeCache()
 
         self.watch("show_stereotypes", self.update_shapes).watch(
             "show_attributes", self.update_shapes
@@ -118,6 +120,7 @@ class ClassItem(ElementPresentation, Classified):
             else:
                 return ()
 
+        shapes = self._compartment_shapes
         self.shape = Box(
             Box(
                 Text(
@@ -144,13 +147,13 @@ class ClassItem(ElementPresentation, Classified):
             *(
                 self.show_attributes
                 and self.subject
-                and [attributes_compartment(self.subject)]
+                and [attributes_compartment(self.subject, shapes)]
                 or []
             ),
             *(
                 self.show_operations
                 and self.subject
-                and [operations_compartment(self.subject)]
+                and [operations_compartment(self.subject, shapes)]
                 or []
             ),
             *(self.show_stereotypes and stereotype_compartments(self.subject) or []),
@@ -161,6 +164,7 @@ class ClassItem(ElementPresentation, Classified):
             },
             draw=draw_border,
         )
+        shapes.sweep()
 
     # TODO: Needs implementing, see also gaphor/diagram/editors.py
     def item_at(self, x, y):
@@ -175,53 +179,85 @@ class ClassItem(ElementPresentation, Classified):
         return self
 
 
-def attributes_compartment(subject):
+def attributes_compartment(subject, shapes=None):
+    """
+    The attributes compartment of a class or interface. Rows are retained
+    in `shapes`, by attribute, so only rows of changed attributes are
+    created (and measured) again.
+    """
+    if shapes is None:
+        shapes = ShapeCache()
+
     # We need to fix the attribute value, since the for loop changes it.
     def lazy_format(attribute):
         # str(), so we never ever get an error on a property part of an association
         return lambda: (UML.format(attribute))
 
-    return Box(
-        *(
-            Text(
-                text=lazy_format(attribute),
-                style={
-                    "text-align": TextAlign.LEFT,
-                    "text-decoration": TextDecoration.UNDERLINE
-                    if attribute.isStatic
-                    else TextDecoration.NONE,
-                },
-            )
-            for attribute in subject.ownedAttribute
-            if not attribute.association
+    def row(attribute):
+        return Text(
+            text=lazy_format(attribute),
+            style={
+                "text-align": TextAlign.LEFT,
+                "text-decoration": TextDecoration.UNDERLINE
+                if attribute.isStatic
+                else TextDecoration.NONE,
+            },
+        )
+
+    rows = tuple(
+        shapes.get((attribute, attribute.isStatic), lambda: row(attribute))
+        for attribute in subject.ownedAttribute
+        if not attribute.association
+    )
+    return shapes.get(
+        ("attributes",) + rows,
+        lambda: Box(
+            *rows,
+            style={"padding": (4, 4, 4, 4), "min-height": 8},
+            draw=draw_top_separator,
         ),
-        style={"padding": (4, 4, 4, 4), "min-height": 8},
-        draw=draw_top_separator,
     )
 
 
-def operations_compartment(subject):
+def operations_compartment(subject, shapes=None):
+    """
+    The operations compartment of a class or interface. Rows are retained
+    in `shapes`, by operation.
+    """
+    if shapes is None:
+        shapes = ShapeCache()
+
     def lazy_format(operation):
         return lambda: UML.format(
             operation, visibility=True, type=True, multiplicity=True, default=True
         )
 
-    return Box(
-        *(
-            Text(
-                text=lazy_format(operation),
-                style={
-                    "text-align": TextAlign.LEFT,
-                    "font-style": FontStyle.ITALIC
-                    if operation.isAbstract
-                    else FontStyle.NORMAL,
-                    "text-decoration": TextDecoration.UNDERLINE
-                    if operation.isStatic
-                    else TextDecoration.NONE,
-                },
-            )
-            for operation in subject.ownedOperation
+    def row(operation):
+        return Text(
+            text=lazy_format(operation),
+            style={
+                "text-align": TextAlign.LEFT,
+                "font-style": FontStyle.ITALIC
+                if operation.isAbstract
+                else FontStyle.NORMAL,
+                "text-decoration": TextDecoration.UNDERLINE
+                if operation.isStatic
+                else TextDecoration.NONE,
+            },
+        )
+
+    rows = tuple(
+        shapes.get(
+            (operation, operation.isAbstract, operation.isStatic),
+            lambda: row(operation),
+        )
+        for operation in subject.ownedOperation
+    )
+    return shapes.get(
+        ("operations",) + rows,
+        lambda: Box(
+            *rows,
+            style={"padding": (4, 4, 4, 4), "min-height": 8},
+            draw=draw_top_separator,
         ),
-        style={"padding": (4, 4, 4, 4), "min-height": 8},
-        draw=draw_top_separator,
     )
@@ -2,10 +2,14 @@
 Test classes.
 """
 
+import time
+
+import pytest
 from gaphas.canvas import instant_cairo_context
 from gaphor import UML
 from gaphor.tests.testcase import TestCase
 from gaphor.diagram.classes.klass import ClassItem
+from gaphor.diagram.shapes import ShapeCache
 
 
 def compartments(item):
@@ -101,3 +105,112 @@ class ClassTestCase(TestCase):
 
         width = klass.width
         assert width > 170.0
+
+    def subscribe_and_rewire_time(self, n_classes):
+        """Return the time it takes to create ``n_classes`` class items, and
+        the time it takes to add an operation with a parameter to each
+        class (which rewires the watches of the class items)."""
+        element_factory = self.element_factory
+        diagram = element_factory.create(UML.Diagram)
+        classes = [element_factory.create(UML.Class) for _ in range(n_classes)]
+
+        start = time.perf_counter()
+        for c in classes:
+            diagram.create(ClassItem, subject=c)
+        subscribe_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for c in classes:
+            oper = element_factory.create(UML.Operation)
+            c.ownedOperation = oper
+            oper.formalParameter = element_factory.create(UML.Parameter)
+        rewire_time = time.perf_counter() - start
+
+        return subscribe_time, rewire_time
+
+    @pytest.mark.benchmark
+    def test_subscribe_and_rewire_many_classes(self):
+        """
+        Watches of class items are set up and rewired in time proportional
+        to the number of class items.
+        """
+        subscribe_500, rewire_500 = self.subscribe_and_rewire_time(500)
+        subscribe_2000, rewire_2000 = self.subscribe_and_rewire_time(2000)
+
+        assert subscribe_2000 / subscribe_500 < 4 * 3
+        assert rewire_2000 / rewire_500 < 4 * 3
+
+    def test_compartment_rows_are_retained(self):
+        element_factory = self.element_factory
+        diagram = element_factory.create(UML.Diagram)
+        klass = diagram.create(ClassItem, subject=element_factory.create(UML.Class))
+        attrs = [element_factory.create(UML.Property) for _ in range(3)]
+        for attr in attrs:
+            klass.subject.ownedAttribute = attr
+        oper = element_factory.create(UML.Operation)
+        klass.subject.ownedOperation = oper
+
+        rows = list(compartments(klass)[0])
+        operations = compartments(klass)[1]
+
+        attrs[1].isStatic = True
+
+        new_rows = list(compartments(klass)[0])
+        assert new_rows[0] is rows[0]
+        assert new_rows[1] is not rows[1]
+        assert new_rows[2] is rows[2]
+        assert compartments(klass)[1] is operations
+
+    def test_edit_attribute_of_large_class(self):
+        """
+        Changing one attribute of a class with many attributes only creates
+        the row of that attribute.
+        """
+        element_factory = self.element_factory
+        diagram = element_factory.create(UML.Diagram)
+        klass = diagram.create(ClassItem, subject=element_factory.create(UML.Class))
+        attrs = [element_factory.create(UML.Property) for _ in range(200)]
+        for i, attr in enumerate(attrs):
+            attr.name = f"attribute{i}"
+            klass.subject.ownedAttribute = attr
+        diagram.canvas.update()
+        rows = list(compartments(klass)[0])
+
+        attrs[100].isStatic = True
+        diagram.canvas.update()
+
+        new_rows = list(compartments(klass)[0])
+        assert len(new_rows) == 200
+        assert [i for i, row in enumerate(new_rows) if row is not rows[i]] == [100]
+
+    def edit_attribute_time(self, n_attributes, retained):
+        """Return the time it takes to update a class item with
+        ``n_attributes`` attributes after one attribute changed. If not
+        ``retained``, the shapes of all rows are created anew."""
+        element_factory = self.element_factory
+        diagram = element_factory.create(UML.Diagram)
+        klass = diagram.create(ClassItem, subject=element_factory.create(UML.Class))
+        for i in range(n_attributes):
+            attr = element_factory.create(UML.Property)
+            attr.name = f"attribute{i}"
+            klass.subject.ownedAttribute = attr
+        diagram.canvas.update()
+
+        start = time.perf_counter()
+        for i in range(10):
+            if not retained:
+                klass._compartment_shapes = ShapeCache()
+            attr.isStatic = not attr.isStatic
+            diagram.canvas.update()
+        return time.perf_counter() - start
+
+    @pytest.mark.benchmark
+    def test_edit_attribute_of_large_class_time(self):
+        """
+        Updating a class with 200 attributes after editing one attribute is
+        faster with retained rows than with rows created anew.
+        """
+        rebuild = self.edit_attribute_time(200, retained=False)
+        retained = self.edit_attribute_time(200, retained=True)
+
+        assert retained < rebuild, (retained, rebuild)
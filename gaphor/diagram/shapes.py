@@ -1,5 +1,6 @@
-from math import pi, atan2
+from math import pi, atan2, hypot
 from gaphas.geometry import Rectangle
+from gaphas.painter import CairoBoundingBoxContext
 
 from gaphor.diagram.text import (
     text_point_in_box,
@@ -14,6 +15,37 @@ from gaphor.diagram.text import (
 )
 
 
+# Level of detail: below PLACEHOLDER_SCALE (device pixels per unit) text is
+# drawn as a bar, below COLLAPSE_SCALE text and the contents of boxes are
+# not drawn at all.
+PLACEHOLDER_SCALE = 0.5
+COLLAPSE_SCALE = 0.25
+
+
+def draw_scale(cr):
+    """
+    The scale at which is drawn on cr. Bounding boxes are calculated
+    at full detail.
+    """
+    if isinstance(cr, CairoBoundingBoxContext):
+        return 1.0
+    dx, dy = cr.user_to_device_distance(1, 0)
+    return hypot(dx, dy)
+
+
+def draw_placeholder(cr, x, y, w, h):
+    """
+    Draw a bar in place of a text.
+    """
+    cr.save()
+    try:
+        cr.set_source_rgba(0, 0, 0, 0.3)
+        cr.rectangle(x, y + h / 4, w, h / 2)
+        cr.fill()
+    finally:
+        cr.restore()
+
+
 class Padding:  # Enum
     TOP = 0
     RIGHT = 1
@@ -74,6 +106,7 @@ class Box:
     - min-width
     - padding: a tuple (top, right, bottom, left)
 
+    Below COLLAPSE_SCALE only the border of the box is drawn.
     """
 
     def __init__(self, *children, style={}, draw=None):
@@ -125,6 +158,8 @@ class Box:
         height = sum(h for _w, h in self.sizes)
         if self._draw_border:
             self._draw_border(self, context, bounding_box)
+        if self.sizes and draw_scale(context.cairo) < COLLAPSE_SCALE:
+            return
         x = bounding_box.x + padding[Padding.LEFT]
         if valign is VerticalAlign.MIDDLE:
             y = (
@@ -152,6 +187,8 @@ class IconBox:
     - min-width
     - vertical-spacing: spacing between icon and children
     - padding: a tuple (top, right, bottom, left)
+
+    Below COLLAPSE_SCALE only the icon is drawn.
     """
 
     def __init__(self, icon, *children, style={}):
@@ -186,6 +223,8 @@ class IconBox:
         w = bounding_box.width - padding[Padding.RIGHT] - padding[Padding.LEFT]
         h = bounding_box.height - padding[Padding.TOP] - padding[Padding.BOTTOM]
         self.icon.draw(context, Rectangle(x, y, w, h))
+        if self.sizes and draw_scale(context.cairo) < COLLAPSE_SCALE:
+            return
         y = y + bounding_box.height + vertical_spacing
         for c, (cw, ch) in zip(self.children, self.sizes):
             mw = max(w, cw)
@@ -193,10 +232,46 @@ class IconBox:
             y += ch
 
 
+class ShapeCache:
+    """
+    Retain shapes between updates of an item's shape tree.
+
+    Shapes are looked up by key, for example the model element a shape
+    represents. If no shape is known for a key, it's created by a factory
+    function. Shapes not looked up since the last call to `sweep()` are
+    dropped by `sweep()`.
+    """
+
+    def __init__(self):
+        self._shapes = {}
+        self._used = {}
+
+    def get(self, key, factory):
+        try:
+            shape = self._shapes[key]
+        except KeyError:
+            shape = factory()
+        self._used[key] = shape
+        return shape
+
+    def sweep(self):
+        self._shapes = self._used
+        self._used = {}
+
+
 class Text:
+    """
+    A text shape.
+
+    Below PLACEHOLDER_SCALE the text is drawn as a bar, below
+    COLLAPSE_SCALE it is not drawn at all.
+    """
+
     def __init__(self, text=lambda: "", width=lambda: -1, style={}):
         self._text = text if callable(text) else lambda: text
         self.width = width if callable(width) else lambda: width
+        self._size_key = None
+        self._size = None
         self.style = {
             "width": -1,
             "min-width": 30,
@@ -227,18 +302,29 @@ class Text:
         }
 
     def size(self, cr):
+        # The style is fixed, so only measure again if the text changed
+        key = (self.text(), self.width())
+        if key == self._size_key:
+            return self._size
+
         min_w = self.style("min-width")
         min_h = self.style("min-height")
         padding = self.style("padding")
 
-        width, height = text_size(cr, self.text(), self.font(), self.width())
-        return (
+        width, height = text_size(cr, key[0], self.font(), key[1])
+        self._size_key = key
+        self._size = (
             max(min_w, width + padding[Padding.RIGHT] + padding[Padding.LEFT]),
             max(min_h, height + padding[Padding.TOP] + padding[Padding.BOTTOM]),
         )
+        return self._size
 
     def draw(self, context, bounding_box):
         cr = context.cairo
+        scale = draw_scale(cr)
+        if scale < COLLAPSE_SCALE:
+            return tuple(bounding_box)
+
         min_w = max(self.style("min-width"), bounding_box.width)
         min_h = max(self.style("min-height"), bounding_box.height)
         text_align = self.style("text-align")
@@ -252,6 +338,16 @@ class Text:
             bounding_box.height - padding[Padding.TOP] - padding[Padding.BOTTOM],
         )
 
+        if scale < PLACEHOLDER_SCALE:
+            # The size is known from the last update, the text is not laid out
+            width, height = self.size(cr)
+            w = width - padding[Padding.RIGHT] - padding[Padding.LEFT]
+            h = height - padding[Padding.TOP] - padding[Padding.BOTTOM]
+            x, y = text_point_in_box(text_box, (w, h), text_align, vertical_align)
+            if self.text():
+                draw_placeholder(cr, x, y, w, h)
+            return x, y, w, h
+
         x, y, w, h = text_draw(
             cr,
             self.text(),
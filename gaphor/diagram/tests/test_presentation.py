@@ -132,3 +132,36 @@ def test_line_loading(element_factory, diagram):
     assert tuple(p.handles()[0].pos) == (1.0, 2.0)
     assert tuple(p.handles()[1].pos) == (3.0, 4.0)
     assert p.subject is subject
+
+
+def test_watchers_are_subscribed_while_diagram_is_shown(element_factory):
+    element_factory.lazy_watchers = True
+    diagram = element_factory.create(UML.Diagram)
+    p = diagram.create(TestElement, subject=element_factory.create(UML.Class))
+    dispatcher = element_factory.element_dispatcher
+
+    assert not diagram.canvas.watching
+    assert not dispatcher._handlers
+
+    updates = []
+    p.request_update = lambda *args, **kwargs: updates.append(args)
+    diagram.canvas.show()
+
+    assert dispatcher._handlers
+    assert updates, "Items should be refreshed when shown"
+
+    diagram.canvas.hide()
+
+    assert not dispatcher._handlers
+
+
+def test_switch_to_lazy_watchers(element_factory, diagram):
+    diagram.create(TestElement, subject=element_factory.create(UML.Class))
+    dispatcher = element_factory.element_dispatcher
+
+    assert dispatcher._handlers
+
+    element_factory.lazy_watchers = True
+    diagram.canvas.update_watchers()
+
+    assert not dispatcher._handlers
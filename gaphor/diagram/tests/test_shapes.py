@@ -1,7 +1,7 @@
 import pytest
 import cairo
 
-from gaphor.diagram.shapes import Box, IconBox, Text
+from gaphor.diagram.shapes import Box, IconBox, ShapeCache, Text
 from gaphas.canvas import Context
 from gaphas.geometry import Rectangle
 
@@ -113,3 +113,94 @@ def test_text_width_min_height(cr):
 
     _, h = text.size(cr)
     assert h == 40
+
+
+def test_text_is_measured_once(cr, monkeypatch):
+    measured = []
+
+    def text_size(cr, text, *args):
+        measured.append(text)
+        return (60, 15)
+
+    monkeypatch.setattr("gaphor.diagram.shapes.text_size", text_size)
+    content = ["some text"]
+    text = Text(lambda: content[0])
+
+    text.size(cr)
+    text.size(cr)
+    content[0] = "other text"
+    text.size(cr)
+
+    assert measured == ["some text", "other text"]
+
+
+def test_shape_cache_retains_used_shapes():
+    shapes = ShapeCache()
+    a = shapes.get("a", Text)
+    b = shapes.get("b", Text)
+    shapes.sweep()
+
+    assert shapes.get("a", Text) is a
+    shapes.sweep()
+
+    assert shapes.get("a", Text) is a
+    assert shapes.get("b", Text) is not b
+
+
+@pytest.fixture
+def drawn_texts(monkeypatch):
+    drawn = []
+
+    def text_draw(cr, text, *args, **kwargs):
+        drawn.append(("text", text))
+        return (0, 0, 10, 10)
+
+    def draw_placeholder(cr, x, y, w, h):
+        drawn.append(("placeholder", w))
+
+    monkeypatch.setattr("gaphor.diagram.shapes.text_draw", text_draw)
+    monkeypatch.setattr("gaphor.diagram.shapes.draw_placeholder", draw_placeholder)
+    return drawn
+
+
+@pytest.mark.parametrize(
+    "scale,drawn",
+    [[1.0, [("text", "some text")]], [0.4, [("placeholder", 60)]], [0.1, []]],
+)
+def test_text_level_of_detail(cr, fixed_text_size, drawn_texts, scale, drawn):
+    text = Text("some text")
+    cr.scale(scale, scale)
+
+    text.draw(Context(cairo=cr), Rectangle(0, 0, 100, 20))
+
+    assert drawn_texts == drawn
+
+
+def test_placeholder_uses_measured_size(cr, monkeypatch, drawn_texts):
+    measured = []
+
+    def text_size(cr, text, *args):
+        measured.append(text)
+        return (60, 15)
+
+    monkeypatch.setattr("gaphor.diagram.shapes.text_size", text_size)
+    text = Text("some text")
+    text.size(cr)
+    cr.scale(0.4, 0.4)
+
+    text.draw(Context(cairo=cr), Rectangle(0, 0, 100, 20))
+
+    assert measured == ["some text"]
+    assert drawn_texts == [("placeholder", 60)]
+
+
+def test_box_collapses_when_zoomed_out(cr, fixed_text_size, drawn_texts):
+    borders = []
+    box = Box(Text("some text"), draw=lambda *args: borders.append(args))
+    box.size(cr)
+    cr.scale(0.1, 0.1)
+
+    box.draw(Context(cairo=cr), Rectangle(0, 0, 100, 20))
+
+    assert borders
+    assert not drawn_texts
@@ -118,3 +118,24 @@ def test_text_with_just_font_as_dict(cr):
     w, h = text_size(cr, "Example", {"font": "sans 10"})
     assert w
     assert h
+
+
+def test_text_layout_is_reused(cr):
+    font = {"font": "sans 10", "font-style": FontStyle.ITALIC}
+    layout = gaphor.diagram.text._text_layout(cr, "Example", font, -1)
+
+    assert gaphor.diagram.text._text_layout(cr, "Example", dict(font), -1) is layout
+    assert gaphor.diagram.text._text_layout(cr, "Example", font, 100) is not layout
+    assert gaphor.diagram.text._text_layout(cr, "Other", font, -1) is not layout
+
+
+def test_text_layout_cache_is_bounded(cr, monkeypatch):
+    monkeypatch.setattr(gaphor.diagram.text, "TEXT_LAYOUT_CACHE_SIZE", 10)
+    gaphor.diagram.text.clear_text_cache()
+
+    for i in range(20):
+        text_size(cr, f"Example {i}", "sans 10")
+
+    assert len(gaphor.diagram.text._layout_cache) == 10
+    assert ("Example 19", "sans 10", -1) in gaphor.diagram.text._layout_cache
+    assert ("Example 0", "sans 10", -1) not in gaphor.diagram.text._layout_cache
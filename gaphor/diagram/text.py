@@ -2,6 +2,7 @@
 Support classes for dealing with text.
 """
 
+from collections import OrderedDict
 from enum import Enum
 import cairo
 from gi.repository import GLib, Pango, PangoCairo
@@ -85,9 +86,30 @@ def text_draw(cr, text, font, calculate_pos, width=-1, default_size=(0, 0)):
     return (x, y, w, h)
 
 
-def _text_layout(cr, text, font, width):
-    underline = False
-    layout = _pango_cairo_create_layout(cr)
+# The number of text layouts kept around for reuse
+TEXT_LAYOUT_CACHE_SIZE = 4096
+
+_layout_cache = OrderedDict()
+_font_descriptions = {}
+
+
+def clear_text_cache():
+    """
+    Forget all cached text layouts, e.g. when the font settings change.
+    """
+    _layout_cache.clear()
+    _font_descriptions.clear()
+
+
+def _font_key(font):
+    return tuple(sorted(font.items())) if isinstance(font, dict) else font
+
+
+def _font_description(font, key):
+    try:
+        return _font_descriptions[key]
+    except KeyError:
+        pass
 
     if isinstance(font, dict):
         fd = Pango.FontDescription.from_string(font["font"])
@@ -97,23 +119,52 @@ def _text_layout(cr, text, font, width):
             fd.set_weight(getattr(Pango.Weight, font_weight.name))
         if font_style:
             fd.set_style(getattr(Pango.Style, font_style.name))
-        layout.set_font_description(fd)
-        underline = (
-            font.get("text-decoration", TextDecoration.NONE) == TextDecoration.UNDERLINE
-        )
     else:
-        layout.set_font_description(Pango.FontDescription.from_string(font))
+        fd = Pango.FontDescription.from_string(font)
+
+    _font_descriptions[key] = fd
+    return fd
+
+
+def _text_layout(cr, text, font, width):
+    """
+    A layout for text, in the given font and width. Layouts are kept in a
+    LRU cache, so unchanged text is not laid out and measured over and over
+    again. A cached layout may belong to another cairo context: update it
+    before it's drawn.
+    """
+    font_key = _font_key(font)
+    key = (text, font_key, width)
+    try:
+        layout = _layout_cache[key]
+    except KeyError:
+        pass
+    else:
+        _layout_cache.move_to_end(key)
+        return layout
+
+    layout = _pango_cairo_create_layout(cr)
+    layout.set_font_description(_font_description(font, font_key))
 
+    underline = (
+        isinstance(font, dict)
+        and font.get("text-decoration", TextDecoration.NONE)
+        == TextDecoration.UNDERLINE
+    )
     if underline:
         # TODO: can this be done via Pango attributes instead?
         layout.set_markup(f"<u>{GLib.markup_escape_text(text)}</u>", length=-1)
     else:
         layout.set_text(text, length=-1)
     layout.set_width(int(width * Pango.SCALE))
+
+    _layout_cache[key] = layout
+    if len(_layout_cache) > TEXT_LAYOUT_CACHE_SIZE:
+        _layout_cache.popitem(last=False)
     return layout
 
 
-def _pango_cairo_create_layout(cr):
+def _cairo_context(cr):
     """
     Deal with different types of contexts that are passed down,
     namely FreeHandCairoContext and CairoBoundingBoxContext.
@@ -127,18 +178,21 @@ def _pango_cairo_create_layout(cr):
         assert isinstance(
             cr, cairo.Context
         ), f"cr should be a true Cairo.Context, not {cr}"
+    return cr
+
 
-    return PangoCairo.create_layout(cr)
+def _pango_cairo_create_layout(cr):
+    return PangoCairo.create_layout(_cairo_context(cr))
 
 
 def _pango_cairo_show_layout(cr, layout):
-    if isinstance(cr, FreeHandCairoContext):
-        PangoCairo.show_layout(cr.cr, layout)
-    elif isinstance(cr, CairoBoundingBoxContext):
+    if isinstance(cr, CairoBoundingBoxContext):
         w, h = layout.get_pixel_size()
         cr.rel_line_to(w, h)
         cr.stroke()
     else:
+        cr = _cairo_context(cr)
+        PangoCairo.update_layout(cr, layout)
         PangoCairo.show_layout(cr, layout)
 
 
@@ -15,6 +15,9 @@ class Registry:
         self._tree = _TreeNode()
         self._axes = [axis for name, axis in axes]
         self._axes_dict = {name: (i, axis) for i, (name, axis) in enumerate(axes)}
+        # Query results by the types of the (positional) arguments. Only
+        # possible if all axes match on type.
+        self._cache = {} if all(axis.cacheable for axis in self._axes) else None
 
     def register(self, target, *arg_keys, **kw_keys):
         self._register(target, self._align_with_axes(arg_keys, kw_keys))
@@ -30,6 +33,8 @@ class Registry:
             )
 
         tree_node.target = target
+        if self._cache:
+            self._cache.clear()
 
     def get_registration(self, *arg_keys, **kw_keys):
         tree_node = self._tree
@@ -41,12 +46,27 @@ class Registry:
         return tree_node.target
 
     def lookup(self, *arg_objs, **kw_objs):
-        return next(self.query(*arg_objs, **kw_objs), None)
+        targets = self._targets(arg_objs, kw_objs)
+        return targets[0] if targets else None
 
     def query(self, *arg_objs, **kw_objs):
-        objs = self._align_with_axes(arg_objs, kw_objs)
-        axes = self._axes
-        return self._query(self._tree, objs, axes)
+        return iter(self._targets(arg_objs, kw_objs))
+
+    def _targets(self, arg_objs, kw_objs):
+        """ Return a tuple of all targets matching the arguments, from most
+        to least specific. Results are cached if possible. """
+        cache = self._cache
+        if cache is None or kw_objs:
+            objs = self._align_with_axes(arg_objs, kw_objs)
+            return tuple(self._query(self._tree, objs, self._axes))
+
+        key = tuple(map(type, arg_objs))
+        try:
+            return cache[key]
+        except KeyError:
+            objs = self._align_with_axes(arg_objs, kw_objs)
+            targets = cache[key] = tuple(self._query(self._tree, objs, self._axes))
+            return targets
 
     def _query(self, tree_node, objs, axes):
         """ Recursively traverse registration tree, from left to right, most
@@ -120,6 +140,9 @@ class SimpleAxis:
     axes.
     """
 
+    # Set if matches only depend on the type of the object, so they can be cached
+    cacheable = False
+
     def matches(self, obj, keys):
         for key in self.get_keys(obj):
             if key in keys:
@@ -138,5 +161,7 @@ class TypeAxis(SimpleAxis):
     method resolution order.
     """
 
+    cacheable = True
+
     def get_keys(self, obj):
         return type(obj).mro()
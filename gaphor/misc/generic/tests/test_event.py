@@ -154,6 +154,20 @@ def test_unsubscribe_event_inheritance():
     assert "handler2" in eb.effects
 
 
+def test_subscribe_after_handling_event():
+    events = create_manager()
+    events.subscribe(make_handler("handler1"), EventA)
+    events.handle(EventB())
+
+    # Handler lookups are cached, subscribing should invalidate the cache
+    events.subscribe(make_handler("handler2"), EventB)
+    events.subscribe(make_handler("handler3"), EventA)
+
+    eb = EventB()
+    events.handle(eb)
+    assert sorted(eb.effects) == ["handler1", "handler2", "handler3"]
+
+
 class Event:
     def __init__(self):
         self.effects = []
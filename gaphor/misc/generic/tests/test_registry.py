@@ -142,3 +142,42 @@ def test_bad_lookup():
         registry.lookup(foo=1)
     with pytest.raises(ValueError):
         registry.register(1, "foo", name="foo")
+
+
+def test_lookup_is_cached():
+    registry = Registry(("type", TypeAxis()))
+    registry.register("one", DummyA)
+
+    assert registry.lookup(DummyB()) == "one"
+    assert registry._cache == {(DummyB,): ("one",)}
+
+
+def test_register_invalidates_cache():
+    registry = Registry(("type", TypeAxis()))
+    registry.register("one", DummyA)
+
+    assert registry.lookup(DummyB()) == "one"
+
+    registry.register("two", DummyB)
+
+    assert registry.lookup(DummyB()) == "two"
+    assert list(registry.query(DummyB())) == ["two", "one"]
+
+
+def test_lookup_is_not_cached_for_simple_axis():
+    registry = Registry(("type", TypeAxis()), ("name", SimpleAxis()))
+    registry.register("one", DummyA, "foo")
+
+    assert registry.lookup(DummyA(), "foo") == "one"
+    assert registry.lookup(DummyA(), "bar") is None
+    assert registry._cache is None
+
+
+def test_cached_lookup_too_many_keys():
+    registry = Registry(("type", TypeAxis()))
+    registry.register("one", DummyA)
+
+    with pytest.raises(ValueError):
+        registry.lookup(DummyA(), DummyA())
+    with pytest.raises(ValueError):
+        registry.lookup(DummyA(), DummyA())
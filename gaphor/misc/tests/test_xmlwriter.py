@@ -82,3 +82,62 @@ def test_elements_ns_1():
         % sys.getdefaultencoding()
     )
     assert w.s == xml, w.s
+
+
+def write_document(xml_w):
+    xml_w.startDocument()
+    xml_w.startPrefixMapping(None, "http://gaphor.devjavu.com/schema")
+    xml_w.startElementNS(
+        ("http://gaphor.devjavu.com/schema", "foo"),
+        "qn",
+        {("http://gaphor.devjavu.com/schema", "version"): "3.0"},
+    )
+    for i in range(100):
+        xml_w.startElement("bar", {"id": str(i), "type": "Bar & <Baz>"})
+        xml_w.startElement("val", {})
+        xml_w.characters(f"hello <{i}> & goodbye")
+        xml_w.endElement("val")
+        xml_w.startElement("empty", {})
+        xml_w.endElement("empty")
+        xml_w.endElement("bar")
+    xml_w.endElementNS(("http://gaphor.devjavu.com/schema", "foo"), "qn")
+    xml_w.endDocument()
+
+
+class CountingWriter(Writer):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        super().write(text)
+        self.writes += 1
+
+
+def test_buffered_output_is_identical():
+    w = CountingWriter()
+    write_document(XMLWriter(w))
+
+    buffered_w = CountingWriter()
+    write_document(XMLWriter(buffered_w, buffer_size=1024))
+
+    assert buffered_w.s == w.s
+    assert 'type="Bar &amp; &lt;Baz&gt;"' in w.s
+    assert "<val>hello &lt;1&gt; &amp; goodbye</val>" in w.s
+    assert buffered_w.writes < len(w.s) / 1024 + 1
+    assert buffered_w.writes < w.writes / 10
+
+
+def test_buffered_flush():
+    w = Writer()
+    xml_w = XMLWriter(w, buffer_size=1024)
+    xml_w.startDocument()
+    xml_w.startElement("foo", {})
+    xml_w.endElement("foo")
+
+    assert w.s == ""
+
+    xml_w.flush()
+
+    xml = """<?xml version="1.0" encoding="%s"?>\n<foo/>""" % sys.getdefaultencoding()
+    assert w.s == xml, w.s
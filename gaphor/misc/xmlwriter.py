@@ -1,6 +1,8 @@
+import io
 import sys
 import xml.sax.handler
-from xml.sax.saxutils import escape, quoteattr
+from functools import lru_cache
+from xml.sax.saxutils import quoteattr
 
 # See whether the xmlcharrefreplace error handler is
 # supported
@@ -13,8 +15,23 @@ except ImportError:
     _error_handling = "strict"
 
 
+@lru_cache(maxsize=1024)
+def _quoteattr(value):
+    """Escape an attribute value. Values such as type names are written over
+    and over again, so the escaped forms are cached."""
+    return quoteattr(value)
+
+
 class XMLWriter(xml.sax.handler.ContentHandler):
-    def __init__(self, out=None, encoding=None):
+    """Write a XML document to the file object ``out``.
+
+    If a ``buffer_size`` is provided, the document is collected in memory and
+    written to the output in blocks of (at least) that many characters. The
+    output is the same, but far less ``write()`` calls are made. Call
+    ``endDocument()`` or ``flush()`` to write the remainder of the buffer.
+    """
+
+    def __init__(self, out=None, encoding=None, buffer_size=0):
         if out is None:
             out = sys.stdout
         xml.sax.handler.ContentHandler.__init__(self)
@@ -28,44 +45,72 @@ class XMLWriter(xml.sax.handler.ContentHandler):
         self._in_start_tag = False
         self._next_newline = False
 
+        self._buffer_size = buffer_size
+        if buffer_size:
+            self._buffer = io.StringIO()
+            self._emit = self._buffer.write
+        else:
+            self._emit = out.write
+
+    def flush(self):
+        """Write buffered data to the output."""
+        if self._buffer_size:
+            self._out.write(self._buffer.getvalue())
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
     def _write(self, text, start_tag=False, end_tag=False):
         """
         Write data. Tags should not be escaped. They should be marked
         by setting either ``start_tag`` or ``end_tag`` to ``True``.
         Only the tag should be marked this way. Other stuff, such as
-        namespaces and attributes can be written directly to the file.
+        namespaces and attributes should be part of the start tag text.
         """
         if not isinstance(text, str):
             text = text.decode(self._encoding, _error_handling)
 
-        if self._next_newline:
-            self._out.write("\n")
-            self._next_newline = False
+        if start_tag:
+            self._start_tag(text)
+        elif end_tag:
+            self._end_tag(text)
+        else:
+            self._text(text)
+
+    # A newline is only pending after an end tag, so ``_in_start_tag`` and
+    # ``_next_newline`` are never set at the same time.
 
-        if start_tag and not self._in_start_tag:
+    def _start_tag(self, tag):
+        if self._in_start_tag:
+            self._emit(">\n<" + tag)
+        elif self._next_newline:
+            self._emit("\n<" + tag)
+            self._next_newline = False
             self._in_start_tag = True
-            self._out.write("<")
-        elif start_tag and self._in_start_tag:
-            self._out.write(">")
-            self._out.write("\n")
-            self._out.write("<")
-        elif end_tag and self._in_start_tag:
-            self._out.write("/>")
-            self._in_start_tag = False
-            self._next_newline = True
-            return
-        elif not start_tag and self._in_start_tag:
-            self._out.write(">")
+        else:
+            self._emit("<" + tag)
+            self._in_start_tag = True
+
+    def _end_tag(self, tag):
+        if self._in_start_tag:
+            self._emit("/>")
             self._in_start_tag = False
-        elif end_tag:
-            self._out.write("</")
-            self._out.write(text)
-            self._out.write(">")
+        elif self._next_newline:
+            self._emit(f"\n</{tag}>")
+        else:
+            self._emit(f"</{tag}>")
+        self._next_newline = True
+        if self._buffer_size and self._buffer.tell() >= self._buffer_size:
+            self.flush()
+
+    def _text(self, text):
+        if self._in_start_tag:
+            self._emit(">" + text)
             self._in_start_tag = False
-            self._next_newline = True
-            return
-
-        self._out.write(text)
+        elif self._next_newline:
+            self._emit("\n" + text)
+            self._next_newline = False
+        else:
+            self._emit(text)
 
     def _qname(self, name):
         """Builds a qualified name from a (ns_url, localname) pair"""
@@ -92,35 +137,43 @@ class XMLWriter(xml.sax.handler.ContentHandler):
         self._current_context = self._ns_contexts[-1]
         del self._ns_contexts[-1]
 
+    def endDocument(self):
+        self.flush()
+
     def startElement(self, name, attrs):
-        self._write(name, start_tag=True)
-        for (name, value) in list(attrs.items()):
-            self._out.write(f" {name}={quoteattr(value)}")
+        for key, value in attrs.items():
+            name += f" {key}={_quoteattr(value)}"
+        self._start_tag(name)
 
     def endElement(self, name):
-        self._write(name, end_tag=True)
+        self._end_tag(name)
 
     def startElementNS(self, name, qname, attrs):
-        self._write(self._qname(name), start_tag=True)
+        tag = [self._qname(name)]
 
         for prefix, uri in self._undeclared_ns_maps:
             if prefix:
-                self._out.write(f' xmlns:{prefix}="{uri}"')
+                tag.append(f' xmlns:{prefix}="{uri}"')
             else:
-                self._out.write(f' xmlns="{uri}"')
+                tag.append(f' xmlns="{uri}"')
         self._undeclared_ns_maps = []
 
         for (name, value) in list(attrs.items()):
-            self._out.write(f" {self._qname(name)}={quoteattr(value)}")
+            tag.append(f" {self._qname(name)}={_quoteattr(value)}")
+
+        self._start_tag("".join(tag))
 
     def endElementNS(self, name, qname):
-        self._write("%s" % self._qname(name), end_tag=True)
+        self._end_tag(self._qname(name))
 
     def characters(self, content):
         if self._in_cdata:
             self._write(content.replace("]]>", "] ]>"))
         else:
-            self._write(escape(content))
+            # Same as xml.sax.saxutils.escape(), without the function calls
+            self._text(
+                content.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+            )
 
     def ignorableWhitespace(self, content):
         self._write(content)
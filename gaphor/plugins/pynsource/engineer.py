@@ -36,8 +36,8 @@ class Engineer:
         print(p)
 
         try:
-            self._root_package = self.element_factory.lselect(
-                lambda e: isinstance(e, UML.Package) and not e.namespace
+            self._root_package = list(
+                self.element_factory.select_type(UML.Package, lambda e: not e.namespace)
             )[0]
         except IndexError:
             pass  # running as test?
@@ -90,8 +90,10 @@ class Engineer:
                     ].gaphor_class_item
                 except KeyError as e:
                     print("No class found named", superclassname)
-                    others = self.element_factory.lselect(
-                        lambda e: isinstance(e, UML.Class) and e.name == superclassname
+                    others = list(
+                        self.element_factory.select_type(
+                            UML.Class, lambda e: e.name == superclassname
+                        )
                     )
                     if others:
                         superclass = others[0]
@@ -155,8 +157,10 @@ class Engineer:
             superclass_item = self.parser.classlist[classname].gaphor_class_item
         except KeyError as e:
             print("No class found named", classname)
-            others = self.element_factory.lselect(
-                lambda e: isinstance(e, UML.Class) and e.name == classname
+            others = list(
+                self.element_factory.select_type(
+                    UML.Class, lambda e: e.name == classname
+                )
             )
             if others:
                 superclass = others[0]
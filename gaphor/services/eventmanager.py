@@ -2,17 +2,24 @@
 Event Manager.
 """
 
+import copy
+from contextlib import contextmanager
+
 from gaphor.abc import Service
 from gaphor.misc.generic.event import Manager as _Manager
 
 
-def event_handler(*event_types):
+def event_handler(*event_types, batch=False):
     """
     Mark a function/method as an event handler for a particular type of event.
+
+    If `batch` is set, the handler is called with a list of events, instead
+    of a single event. See `EventManager.batch()`.
     """
 
     def wrapper(func):
         func.__event_types__ = event_types
+        func.__event_batch__ = batch
         return func
 
     return wrapper
@@ -25,36 +32,120 @@ class EventManager(Service):
 
     def __init__(self):
         self._events = _Manager()
+        self._batch_events = _Manager()
+        self._batch_handlers = set()
+        self._queue = None
+        self._coalesce = ()
+        self._coalesced = {}
 
     def shutdown(self):
         pass
 
+    def _manager_for(self, handler):
+        event_types = getattr(handler, "__event_types__", None)
+        if not event_types:
+            raise Exception(f"No event types provided for function {handler}")
+
+        if getattr(handler, "__event_batch__", False):
+            return self._batch_events, event_types
+        return self._events, event_types
+
     def subscribe(self, handler):
         """
         Register a handler. Handlers are triggered (executed) when specific
         events are emitted through the handle() method.
         """
-        event_types = getattr(handler, "__event_types__", None)
-        if not event_types:
-            raise Exception(f"No event types provided for function {handler}")
-
+        manager, event_types = self._manager_for(handler)
         for et in event_types:
-            self._events.subscribe(handler, et)
+            manager.subscribe(handler, et)
+        if manager is self._batch_events:
+            self._batch_handlers.add(handler)
 
     def unsubscribe(self, handler, event_types=None):
         """
         Unregister a previously registered handler.
         """
-        event_types = getattr(handler, "__event_types__", None)
-        if not event_types:
-            raise Exception(f"No event types provided for function {handler}")
-
+        manager, event_types = self._manager_for(handler)
         for et in event_types:
-            self._events.unsubscribe(handler, et)
+            manager.unsubscribe(handler, et)
+        self._batch_handlers.discard(handler)
 
     def handle(self, *events):
         """
         Send event notifications to registered handlers.
         """
+        if self._queue is None:
+            self._deliver(events)
+        elif self._coalesce:
+            for e in events:
+                self._enqueue(e)
+        else:
+            self._queue.extend(events)
+
+    @contextmanager
+    def batch(self, coalesce=()):
+        """
+        Queue the events handled in this context, and deliver them in one
+        pass at the end. Use this for bulk operations, such as creating lots
+        of elements::
+
+            with event_manager.batch(coalesce=(AttributeChangeEvent,)):
+                ...
+
+        Repeated events of one of the `coalesce` types for the same element
+        and property are merged into one event, keeping the ``old_value`` of
+        the first and the ``new_value`` of the last event.
+
+        Batch handlers (see `event_handler()`) are called once, with all
+        events they subscribed to. If a batch is already in progress, the
+        events are added to that batch.
+
+        Handlers only see the events when the batch ends, so make sure an
+        undo transaction is still open by then.
+        """
+        if self._queue is not None:
+            yield
+            return
+
+        self._queue = []
+        self._coalesce = coalesce
+        try:
+            yield
+        finally:
+            events = self._queue
+            self._queue = None
+            self._coalesce = ()
+            self._coalesced = {}
+            self._deliver(events)
+
+    def _enqueue(self, event):
+        queue = self._queue
+        if isinstance(event, self._coalesce):
+            key = (type(event), event.element, event.property)
+            index = self._coalesced.get(key)
+            if index is not None:
+                merged = copy.copy(queue[index])
+                merged.new_value = event.new_value
+                queue[index] = merged
+                return
+            self._coalesced[key] = len(queue)
+        queue.append(event)
+
+    def _deliver(self, events):
+        handle = self._events.handle
+        for e in events:
+            handle(e)
+
+        if not self._batch_handlers:
+            return
+
+        batches = {}
+        query = self._batch_events.registry.query
         for e in events:
-            self._events.handle(e)
+            for handler in {h for handler_set in query(e) for h in handler_set}:
+                try:
+                    batches[handler].append(e)
+                except KeyError:
+                    batches[handler] = [e]
+        for handler, batch in batches.items():
+            handler(batch)
@@ -2,9 +2,12 @@
 The file service is responsible for loading and saving the user data.
 """
 
+import io
 import logging
+import os
+import threading
 
-from gi.repository import Gtk
+from gi.repository import GLib, Gtk
 
 from gaphor import UML
 from gaphor.core import _, action, build_action_group, event_handler
@@ -13,17 +16,25 @@ from gaphor.misc.errorhandler import error_handler
 from gaphor.misc.gidlethread import GIdleThread, Queue
 from gaphor.misc.xmlwriter import XMLWriter
 from gaphor.storage import storage, verify
-from gaphor.ui.event import FilenameChanged, WindowClose
+from gaphor.ui.event import FileLoaded, FileSaved, FilenameChanged, WindowClose
 from gaphor.ui.filedialog import FileDialog
 from gaphor.ui.questiondialog import QuestionDialog
 from gaphor.ui.statuswindow import StatusWindow
 
 DEFAULT_EXT = ".gaphor"
+DELTA_EXT = ".delta"
 MAX_RECENT = 10
+SAVE_BUFFER_SIZE = 1024 * 1024
+AUTOSAVE_INTERVAL = 60  # seconds
 
 log = logging.getLogger(__name__)
 
 
+def delta_filename(filename):
+    """The file autosaved changes to a model file are written to."""
+    return filename + DELTA_EXT
+
+
 class FileManager(Service, ActionProvider):
     """
     The file service, responsible for loading and saving Gaphor models.
@@ -90,11 +101,24 @@ class FileManager(Service, ActionProvider):
 
         self.update_recent_files()
 
+        self._autosave_thread = None
+        self._autosave_version = None
+        interval = properties("autosave-interval", AUTOSAVE_INTERVAL)
+        self._autosave_id = (
+            GLib.timeout_add_seconds(interval, self._on_autosave_timeout)
+            if interval
+            else 0
+        )
+
         event_manager.subscribe(self._on_window_close)
 
     def shutdown(self):
         """Called when shutting down the file manager service."""
         self.event_manager.unsubscribe(self._on_window_close)
+        if self._autosave_id:
+            GLib.source_remove(self._autosave_id)
+            self._autosave_id = 0
+        self._wait_for_autosave()
 
     def get_filename(self):
         """Return the current file name.  This method is used by the filename
@@ -163,8 +187,9 @@ class FileManager(Service, ActionProvider):
     def load(self, filename):
         """Load the Gaphor model from the supplied file name.  A status window
         displays the loading progress.  The load generator updates the progress
-        queue.  The loader is passed to a GIdleThread which executes the load
-        generator.  If loading is successful, the filename is set."""
+        queue.  The file is parsed in a worker thread, while the loader is
+        passed to a GIdleThread which builds the model in small steps from the
+        main loop.  If loading is successful, the filename is set."""
 
         queue = Queue()
 
@@ -180,9 +205,21 @@ class FileManager(Service, ActionProvider):
             log.warning("Could not create status window, proceding without.")
             status_window = None
 
+        delta = delta_filename(filename)
+        if not (
+            os.path.exists(delta)
+            and os.path.getmtime(delta) >= os.path.getmtime(filename)
+        ):
+            delta = None
+        else:
+            log.info(f"Recovering autosaved changes from {delta}")
+
         try:
             loader = storage.load_generator(
-                filename.encode("utf-8"), self.element_factory
+                filename.encode("utf-8"),
+                self.element_factory,
+                delta=delta and delta.encode("utf-8"),
+                threaded=True,
             )
             worker = GIdleThread(loader, queue)
 
@@ -202,6 +239,8 @@ class FileManager(Service, ActionProvider):
             if status_window is not None:
                 status_window.destroy()
 
+        self.event_manager.handle(FileLoaded(self, filename, recovered=bool(delta)))
+
     def verify_orphans(self):
         """Verify that no orphaned elements are saved.  This method checks
         of there are any orphan references in the element factory.  If orphans
@@ -263,7 +302,9 @@ class FileManager(Service, ActionProvider):
         )
         try:
             with open(filename.encode("utf-8"), "w") as out:
-                saver = storage.save_generator(XMLWriter(out), self.element_factory)
+                saver = storage.save_generator(
+                    XMLWriter(out, buffer_size=SAVE_BUFFER_SIZE), self.element_factory
+                )
                 worker = GIdleThread(saver, queue)
                 worker.start()
                 worker.wait()
@@ -272,12 +313,81 @@ class FileManager(Service, ActionProvider):
                 worker.reraise()
 
             self.filename = filename
+            self.element_factory.clear_dirty()
+            self.discard_autosave()
         except:
             error_handler(message=_("Error while saving model to file %s") % filename)
             raise
         finally:
             status_window.destroy()
 
+        self.event_manager.handle(FileSaved(self, filename))
+
+    def autosave(self):
+        """Write the elements changed since the model was last saved to the
+        delta file next to the model file. The delta is serialized right
+        away, the file is written in a background thread.
+
+        The delta is applied when the model file is loaded again, unless the
+        model has been saved (or closed without saving) in the mean time."""
+
+        filename = self.filename
+        factory = self.element_factory
+        if (
+            not filename
+            or factory.dirty_version == self._autosave_version
+            or (self._autosave_thread and self._autosave_thread.is_alive())
+        ):
+            return
+
+        elements, deleted = factory.dirty()
+        self._autosave_version = factory.dirty_version
+        if not elements and not deleted:
+            return
+
+        out = io.StringIO()
+        storage.save(
+            XMLWriter(out, buffer_size=SAVE_BUFFER_SIZE),
+            factory,
+            elements=elements,
+            deleted=deleted,
+        )
+
+        self._autosave_thread = threading.Thread(
+            target=self._write_autosave, args=(delta_filename(filename), out.getvalue())
+        )
+        self._autosave_thread.start()
+
+    def _write_autosave(self, delta, data):
+        try:
+            with open(delta + ".tmp", "w") as out:
+                out.write(data)
+            os.replace(delta + ".tmp", delta)
+        except OSError:
+            log.warning(f"Could not autosave to {delta}", exc_info=True)
+
+    def _wait_for_autosave(self):
+        if self._autosave_thread:
+            self._autosave_thread.join()
+            self._autosave_thread = None
+
+    def discard_autosave(self):
+        """Remove the autosaved changes of the current model file."""
+        self._wait_for_autosave()
+        self._autosave_version = None
+        if self.filename:
+            try:
+                os.remove(delta_filename(self.filename))
+            except FileNotFoundError:
+                pass
+
+    def _on_autosave_timeout(self):
+        try:
+            self.autosave()
+        except Exception:
+            log.warning("Autosave failed", exc_info=True)
+        return True
+
     def _open_dialog(self, title):
         """Open a file chooser dialog to select a model
         file to open."""
@@ -474,6 +584,7 @@ class FileManager(Service, ActionProvider):
                 if saved:
                     self.main_window.quit()
             if response == Gtk.ResponseType.REJECT:
+                self.discard_autosave()
                 self.main_window.quit()
         else:
             self.main_window.quit()
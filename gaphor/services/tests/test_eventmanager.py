@@ -0,0 +1,132 @@
+from gaphor.services.eventmanager import EventManager, event_handler
+from gaphor.UML.event import AttributeChangeEvent, ElementEvent
+
+
+class Element:
+    pass
+
+
+def test_handle_event():
+    event_manager = EventManager()
+    events = []
+
+    @event_handler(ElementEvent)
+    def handler(event):
+        events.append(event)
+
+    event_manager.subscribe(handler)
+    event = ElementEvent(Element())
+    event_manager.handle(event)
+
+    assert events == [event]
+
+
+def test_batch_delays_events():
+    event_manager = EventManager()
+    events = []
+
+    @event_handler(ElementEvent)
+    def handler(event):
+        events.append(event)
+
+    event_manager.subscribe(handler)
+    e1 = ElementEvent(Element())
+    e2 = ElementEvent(Element())
+
+    with event_manager.batch():
+        event_manager.handle(e1)
+        with event_manager.batch():
+            event_manager.handle(e2)
+        assert events == []
+
+    assert events == [e1, e2]
+
+
+def test_batch_coalesces_events():
+    event_manager = EventManager()
+    events = []
+
+    @event_handler(AttributeChangeEvent)
+    def handler(event):
+        events.append(event)
+
+    event_manager.subscribe(handler)
+    element = Element()
+    other = Element()
+
+    with event_manager.batch(coalesce=(AttributeChangeEvent,)):
+        event_manager.handle(AttributeChangeEvent(element, "name", None, "a"))
+        event_manager.handle(AttributeChangeEvent(other, "name", None, "x"))
+        event_manager.handle(AttributeChangeEvent(element, "name", "a", "b"))
+        event_manager.handle(AttributeChangeEvent(element, "name", "b", "c"))
+
+    assert [(e.element, e.old_value, e.new_value) for e in events] == [
+        (element, None, "c"),
+        (other, None, "x"),
+    ]
+
+
+def test_batch_handler():
+    event_manager = EventManager()
+    batches = []
+
+    @event_handler(ElementEvent, batch=True)
+    def handler(events):
+        batches.append(events)
+
+    event_manager.subscribe(handler)
+    e1 = ElementEvent(Element())
+    e2 = AttributeChangeEvent(Element(), "name", None, "a")
+
+    event_manager.handle(e1)
+    with event_manager.batch():
+        event_manager.handle(e1)
+        event_manager.handle(e2)
+
+    assert batches == [[e1], [e1, e2]]
+
+    event_manager.unsubscribe(handler)
+    event_manager.handle(e1)
+
+    assert len(batches) == 2
+
+
+def test_no_batch_lookup_without_batch_handlers():
+    event_manager = EventManager()
+    events = []
+
+    @event_handler(ElementEvent)
+    def handler(event):
+        events.append(event)
+
+    def query(event):
+        raise AssertionError("batch handlers queried")
+
+    event_manager.subscribe(handler)
+    event_manager._batch_events.registry.query = query
+    event = ElementEvent(Element())
+
+    event_manager.handle(event)
+
+    assert events == [event]
+
+
+def test_events_are_delivered_if_batch_fails():
+    event_manager = EventManager()
+    events = []
+
+    @event_handler(ElementEvent)
+    def handler(event):
+        events.append(event)
+
+    event_manager.subscribe(handler)
+    event = ElementEvent(Element())
+
+    try:
+        with event_manager.batch():
+            event_manager.handle(event)
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert events == [event]
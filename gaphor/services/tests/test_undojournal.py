@@ -0,0 +1,202 @@
+"""
+Test the undo journal.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from gaphor import UML
+from gaphor.misc.xmlwriter import XMLWriter
+from gaphor.services.undojournal import (
+    UndoJournal,
+    journal_filename,
+    model_stamp,
+    read_journal,
+    redo_change,
+)
+from gaphor.storage import storage
+from gaphor.tests.testcase import TestCase
+from gaphor.transaction import Transaction
+from gaphor.ui.event import FileLoaded, FileSaved
+
+
+class TestUndoJournal(TestCase):
+
+    services = TestCase.services + ["undo_manager"]
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = self.tmpdir + "/model.gaphor"
+        self.event_manager = self.get_service("event_manager")
+        self.undo_manager = self.get_service("undo_manager")
+        self.journal = UndoJournal(
+            self.event_manager,
+            self.element_factory,
+            self.undo_manager,
+            {"undo-journal": True}.get,
+        )
+        # Saving starts the journal
+        self.save(self.filename)
+
+    def tearDown(self):
+        self.journal.shutdown()
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def save(self, filename):
+        with open(filename, "w") as out:
+            storage.save(XMLWriter(out), self.element_factory)
+        self.event_manager.handle(FileSaved(None, filename))
+
+    def journal_entries(self):
+        self.journal.flush()
+        with open(journal_filename(self.filename)) as f:
+            return [json.loads(line) for line in f]
+
+    def crash(self):
+        """
+        Stop journaling without marking the journal closed, and reset the
+        model and undo history.
+        """
+        writer = self.journal._writer
+        self.journal._writer = None
+        writer.close()
+        for element in self.element_factory.lselect():
+            if element is not self.diagram:
+                element.unlink()
+        self.undo_manager.clear_undo_stack()
+
+    def test_recover_changes_after_crash(self):
+        with Transaction(self.event_manager):
+            package = self.element_factory.create(UML.Package)
+            klass = self.element_factory.create(UML.Class)
+            klass.name = "Foo"
+            klass.package = package
+        with Transaction(self.event_manager):
+            klass.name = "Bar"
+
+        self.crash()
+        assert not self.element_factory.lookup(klass.id)
+
+        self.journal.open(self.filename)
+
+        recovered = self.element_factory.lookup(klass.id)
+        assert recovered.name == "Bar"
+        assert recovered.package is self.element_factory.lookup(package.id)
+        assert len(self.undo_manager._undo_stack) == 2
+
+        self.undo_manager.undo_transaction()
+        assert recovered.name == "Foo"
+
+        self.undo_manager.undo_transaction()
+        assert not self.element_factory.lookup(klass.id)
+        assert not self.element_factory.lookup(package.id)
+
+    def test_save_starts_a_new_journal(self):
+        with Transaction(self.event_manager):
+            klass = self.element_factory.create(UML.Class)
+            klass.name = "Foo"
+        assert len(self.journal_entries()) == 2
+
+        self.save(self.filename)
+
+        assert self.journal_entries() == [{"saved": model_stamp(self.filename)}]
+
+    def test_journal_of_other_model_version_is_ignored(self):
+        with Transaction(self.event_manager):
+            klass = self.element_factory.create(UML.Class)
+
+        self.crash()
+        stat = os.stat(self.filename)
+        os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.journal.open(self.filename)
+
+        assert not self.element_factory.lookup(klass.id)
+        assert not self.undo_manager.can_undo()
+        assert self.journal_entries() == [{"saved": model_stamp(self.filename)}]
+
+    def test_journal_is_not_replayed_over_autosaved_changes(self):
+        with Transaction(self.event_manager):
+            klass = self.element_factory.create(UML.Class)
+            klass.name = "Foo"
+        delta = self.filename + ".delta"
+        elements, deleted = self.element_factory.dirty()
+        with open(delta, "w") as out:
+            storage.save(
+                XMLWriter(out), self.element_factory, elements=elements, deleted=deleted
+            )
+
+        self.crash()
+        for _ in storage.load_generator(
+            self.filename, self.element_factory, delta=delta
+        ):
+            pass
+        self.event_manager.handle(FileLoaded(None, self.filename, recovered=True))
+
+        recovered = self.element_factory.lselect(lambda e: e.id == klass.id)
+        assert len(recovered) == 1
+        assert recovered[0].name == "Foo"
+        assert not self.undo_manager.can_undo()
+        assert self.journal_entries() == [{"saved": model_stamp(self.filename)}]
+
+    def test_closed_journal_does_not_recover_changes(self):
+        with Transaction(self.event_manager):
+            klass = self.element_factory.create(UML.Class)
+
+        self.journal.close()
+        klass.unlink()
+        self.undo_manager.clear_undo_stack()
+
+        self.journal.open(self.filename)
+
+        assert not self.element_factory.lookup(klass.id)
+        assert not self.undo_manager.can_undo()
+
+    def test_undo_deleted_element_restores_attributes(self):
+        with Transaction(self.event_manager):
+            klass = self.element_factory.create(UML.Class)
+            klass.name = "Foo"
+            klass.isAbstract = True
+        with Transaction(self.event_manager):
+            klass.unlink()
+
+        self.crash()
+        self.journal.open(self.filename)
+        assert not self.element_factory.lookup(klass.id)
+
+        self.undo_manager.undo_transaction()
+        restored = self.element_factory.lookup(klass.id)
+        assert restored.name == "Foo"
+        assert restored.isAbstract
+
+
+def test_read_journal(tmp_path):
+    filename = str(tmp_path / "model.gaphor.journal")
+    with open(filename, "w") as f:
+        for entry in [{"saved": 1}, [["create", "1", "Class"]], {"saved": 2}]:
+            f.write(json.dumps(entry) + "\n")
+        for entry in [[["delete", "1"]], "closed", [["create", "2", "Class"]]]:
+            f.write(json.dumps(entry) + "\n")
+        f.write('[["create", "3", "Cl')
+
+    stamp, pending = read_journal(filename)
+
+    assert stamp == 2
+    assert pending == [[["create", "2", "Class"]]]
+
+
+def test_missing_journal(tmp_path):
+    assert read_journal(journal_filename(str(tmp_path / "model.gaphor"))) == (None, [])
+
+
+def test_redo_create_of_existing_element():
+    element_factory = UML.ElementFactory()
+    klass = element_factory.create(UML.Class)
+
+    redo_change(element_factory, ["create", klass.id, "Class"])
+
+    assert element_factory.lselect() == [klass]
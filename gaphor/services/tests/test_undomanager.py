@@ -2,7 +2,10 @@
 Test the UndoManager.
 """
 
+import pytest
+
 from gaphor.core import event_handler
+from gaphor.UML.event import AttributeChangeEvent
 from gaphor.tests.testcase import TestCase
 from gaphor.services.undomanager import UndoManager
 from gaphor.services.eventmanager import EventManager
@@ -270,6 +273,33 @@ class TestUndoManager(TestCase):
 
         undo_manager.shutdown()
 
+    def test_element_factory_undo_updates_type_index(self):
+        from gaphor.UML.element import Element
+
+        event_manager = EventManager()
+        undo_manager = UndoManager(event_manager)
+        element_factory = ElementFactory(event_manager)
+
+        undo_manager.begin_transaction()
+        p = element_factory.create(Element)
+        undo_manager.commit_transaction()
+
+        undo_manager.undo_transaction()
+        assert list(element_factory.select_type(Element)) == []
+
+        undo_manager.redo_transaction()
+        assert list(element_factory.select_type(Element)) == [p]
+
+        undo_manager.begin_transaction()
+        p.unlink()
+        undo_manager.commit_transaction()
+        assert list(element_factory.select_type(Element)) == []
+
+        undo_manager.undo_transaction()
+        assert list(element_factory.select_type(Element)) == [p]
+
+        undo_manager.shutdown()
+
     def test_element_factory_rollback(self):
         from gaphor.UML.element import Element
 
@@ -400,3 +430,171 @@ class TestUndoManager(TestCase):
         assert p in element_factory.lselect()
 
         undo_manager.shutdown()
+
+    def test_repeated_attribute_changes_are_compacted(self):
+        from gaphor.UML.properties import attribute
+        from gaphor.UML.element import Element
+
+        event_manager = EventManager()
+        undo_manager = UndoManager(event_manager)
+        element_factory = ElementFactory(event_manager)
+
+        class A(Element):
+            attr = attribute("attr", str, default="default")
+
+        a = element_factory.create(A)
+        with Transaction(event_manager):
+            a.attr = "one"
+            a.attr = "two"
+            a.attr = "three"
+
+        assert len(undo_manager._undo_stack[-1]._actions) == 1
+
+        undo_manager.undo_transaction()
+        assert a.attr == "default", a.attr
+
+        undo_manager.redo_transaction()
+        assert a.attr == "three", a.attr
+
+        undo_manager.shutdown()
+
+    def test_matrix_updates_are_merged(self):
+        from gaphas.item import Item
+
+        event_manager = EventManager()
+        undo_manager = UndoManager(event_manager)
+        item = Item()
+
+        with Transaction(event_manager):
+            for i in range(10):
+                item.matrix.translate(1, 2)
+                item.matrix.rotate(0.1)
+
+        assert len(undo_manager._undo_stack[-1]._actions) == 20
+
+        with Transaction(event_manager):
+            for i in range(10):
+                item.matrix.translate(1, 2)
+
+        assert len(undo_manager._undo_stack[-1]._actions) == 1
+        undo_manager.undo_transaction()
+        undo_manager.undo_transaction()
+        assert tuple(item.matrix) == pytest.approx((1, 0, 0, 1, 0, 0))
+
+        undo_manager.shutdown()
+
+    def test_stack_memory_budget(self):
+        from gaphor.UML.element import Element
+
+        event_manager = EventManager()
+        undo_manager = UndoManager(event_manager)
+        element_factory = ElementFactory(event_manager)
+
+        for i in range(5):
+            with Transaction(event_manager):
+                element_factory.create(Element)
+
+        assert len(undo_manager._undo_stack) == 5
+        tx_size = undo_manager._undo_stack[-1].size
+        assert tx_size > 0
+
+        undo_manager._stack_bytes = 3 * tx_size
+        with Transaction(event_manager):
+            element_factory.create(Element)
+
+        assert len(undo_manager._undo_stack) == 3
+
+        # The most recent transaction is retained, whatever its size
+        undo_manager._stack_bytes = 0
+        with Transaction(event_manager):
+            element_factory.create(Element)
+
+        assert len(undo_manager._undo_stack) == 1
+        assert undo_manager.can_undo()
+
+        undo_manager.shutdown()
+
+
+def undo_transaction_cost(n, closures=False, trace_memory=True):
+    """
+    Measure the memory retained by, and the time needed to record and
+    undo, a transaction of n attribute changes. Memory is only measured
+    if `trace_memory` is set, since tracing slows down recording.
+
+    With closures, undo actions are recorded as nested functions instead
+    of undo records, for comparison.
+    """
+    import time
+    import tracemalloc
+    from gaphor.UML.properties import attribute
+    from gaphor.UML.element import Element
+
+    class A(Element):
+        attr = attribute("attr", str, default="default")
+
+    event_manager = EventManager()
+    undo_manager = UndoManager(event_manager)
+    element_factory = ElementFactory(event_manager)
+    elements = [element_factory.create(A) for i in range(n)]
+
+    if closures:
+
+        def undo_attribute_change_event(event):
+            attribute = event.property
+            element = event.element
+            value = event.old_value
+
+            def _undo_attribute_change_event():
+                attribute._set(element, value)
+
+            undo_manager.add_undo_action(_undo_attribute_change_event)
+
+        event_manager.unsubscribe(undo_manager.undo_attribute_change_event)
+        event_manager.subscribe(
+            event_handler(AttributeChangeEvent)(undo_attribute_change_event)
+        )
+
+    retained = None
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        with Transaction(event_manager):
+            for e in elements:
+                e.attr = "changed"
+        record_time = time.perf_counter() - start
+        if trace_memory:
+            retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    start = time.perf_counter()
+    undo_manager.undo_transaction()
+    undo_time = time.perf_counter() - start
+
+    assert all(e.attr == "default" for e in elements)
+    undo_manager.shutdown()
+    return retained, record_time, undo_time
+
+
+def test_undo_records_use_less_memory_than_closures():
+    records, _, _ = undo_transaction_cost(10000)
+    closures, _, _ = undo_transaction_cost(10000, closures=True)
+
+    assert records < closures
+
+
+@pytest.mark.benchmark
+def test_undo_records_throughput():
+    """
+    Recording and undoing 10k changes with undo records is not slower than
+    with closures.
+    """
+    _, record_time, undo_time = undo_transaction_cost(10000, trace_memory=False)
+    _, closure_record_time, closure_undo_time = undo_transaction_cost(
+        10000, closures=True, trace_memory=False
+    )
+
+    assert record_time < closure_record_time * 1.5, (record_time, closure_record_time)
+    assert undo_time < closure_undo_time * 1.5, (undo_time, closure_undo_time)
@@ -0,0 +1,447 @@
+"""
+A persistent journal of the changes made to a model.
+
+When enabled (property ``undo-journal``), every committed transaction is
+appended to a journal file next to the model file (``<model>.journal``).
+Saving the model starts a new journal, with a *saved* marker that records
+the modification time of the model file. Closing the model (or the
+application) appends a *closed* marker.
+
+When the model is opened again, transactions after the saved marker that
+were not discarded by closing the model are left over from a crash. They're
+replayed over the model and restored as undo history. A journal whose saved
+marker does not match the model file belongs to another version of the
+model, and is ignored.
+
+Only changes to model elements (those defined in `gaphor.UML`) are
+journaled. Diagram items and their layout are not.
+
+The journal file is written from a background thread, so a commit does
+not wait for the disk.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from functools import partial
+
+from gaphor import UML
+from gaphor.UML.event import (
+    ElementCreateEvent,
+    ElementDeleteEvent,
+    AssociationSetEvent,
+    AssociationAddEvent,
+    AssociationDeleteEvent,
+    AttributeChangeEvent,
+    ModelFactoryEvent,
+)
+from gaphor.UML.properties import (
+    association as association_property,
+    attribute,
+    enumeration,
+    redefine,
+)
+from gaphor.abc import Service
+from gaphor.core import event_handler
+from gaphor.event import TransactionBegin, TransactionCommit, TransactionRollback
+from gaphor.services.undomanager import ActionStack
+from gaphor.ui.event import FileLoaded, FileSaved
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_EXT = ".journal"
+
+SAVED = "saved"
+CLOSED = "closed"
+
+# The saved marker is written as {"saved": modification time}.
+#
+# Changes are lists, that can be written as JSON:
+#
+#   ["create", id, type name]
+#   ["delete", id, type name, {attribute name: value}]
+#   ["attribute", id, property name, old value, new value]
+#   ["reference", id, property name, old id, new id]
+#   ["add", id, property name, id]
+#   ["remove", id, property name, id]
+
+
+def journal_filename(filename):
+    return filename + JOURNAL_EXT
+
+
+def model_stamp(filename):
+    """
+    The modification time of a model file, in nanoseconds, as recorded in
+    the saved marker. None if the file does not exist.
+    """
+    try:
+        return os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def saved_marker(filename):
+    return {SAVED: model_stamp(filename)}
+
+
+def read_journal(filename):
+    """
+    Read a journal. Returns a tuple (stamp, pending): the model stamp of the
+    last saved marker and the transactions after it that were not
+    discarded. Each transaction is a list of changes. The stamp is None if
+    the journal has no saved marker.
+
+    An incomplete last line, written while crashing, is ignored.
+    """
+    stamp = None
+    pending = []
+    try:
+        with open(filename) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring corrupt journal entry in {filename}")
+                    break
+                if isinstance(entry, dict) and SAVED in entry:
+                    stamp = entry[SAVED]
+                    pending = []
+                elif entry == CLOSED:
+                    pending = []
+                else:
+                    pending.append(entry)
+    except FileNotFoundError:
+        pass
+    return stamp, pending
+
+
+class JournalWriter:
+    """
+    Append entries to a journal file, from a background thread.
+    """
+
+    def __init__(self, filename, truncate=False):
+        self.filename = filename
+        self._queue = queue.Queue()
+        self._file = open(filename, "w" if truncate else "a")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def append(self, entry):
+        self._queue.put(entry)
+
+    def flush(self):
+        """
+        Wait until all entries are written.
+        """
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._file.write(json.dumps(entry))
+                self._file.write("\n")
+                if self._queue.empty():
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            except Exception:
+                logger.error("Could not write undo journal", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+def is_journaled(element):
+    return getattr(UML, type(element).__name__, None) is type(element)
+
+
+def attribute_values(element):
+    """
+    The attribute values of an element, since these are not reverted by
+    association changes.
+    """
+    return {
+        prop.name: prop._get(element)
+        for prop in element.umlproperties()
+        if isinstance(prop, (attribute, enumeration)) and hasattr(element, prop._name)
+    }
+
+
+def _property(element, name):
+    prop = getattr(type(element), name)
+    while isinstance(prop, redefine):
+        prop = prop.original
+    return prop
+
+
+def _create(factory, id, type_name, attributes=None):
+    type = getattr(UML, type_name)
+    element = factory.lookup(id)
+    if element is None:
+        element = factory.create_as(type, id)
+    elif not isinstance(element, type):
+        logger.warning(f"Element {id} exists, but is not a {type_name}")
+        return
+    for name, value in (attributes or {}).items():
+        _property(element, name)._set(element, value)
+
+
+def _delete(factory, id):
+    element = factory.lookup(id)
+    if element:
+        element.unlink()
+
+
+def _set_attribute(factory, id, name, value):
+    element = factory.lookup(id)
+    _property(element, name)._set(element, value)
+
+
+def _set_reference(factory, id, name, value_id):
+    element = factory.lookup(id)
+    value = factory.lookup(value_id) if value_id else None
+    _property(element, name)._set(element, value, from_opposite=True)
+
+
+def _add(factory, id, name, value_id):
+    element = factory.lookup(id)
+    _property(element, name)._set(element, factory.lookup(value_id), True)
+
+
+def _remove(factory, id, name, value_id):
+    element = factory.lookup(id)
+    _property(element, name)._del(element, factory.lookup(value_id), True)
+
+
+def redo_change(factory, change):
+    """
+    Apply a journaled change to the model.
+    """
+    op, id = change[:2]
+    if op == "create":
+        _create(factory, id, change[2])
+    elif op == "delete":
+        _delete(factory, id)
+    elif op == "attribute":
+        _set_attribute(factory, id, change[2], change[4])
+    elif op == "reference":
+        _set_reference(factory, id, change[2], change[4])
+    elif op == "add":
+        _add(factory, id, change[2], change[3])
+    elif op == "remove":
+        _remove(factory, id, change[2], change[3])
+
+
+def undo_change(factory, change):
+    """
+    Revert a journaled change.
+    """
+    op, id = change[:2]
+    if op == "create":
+        _delete(factory, id)
+    elif op == "delete":
+        _create(factory, id, change[2], change[3])
+    elif op == "attribute":
+        _set_attribute(factory, id, change[2], change[3])
+    elif op == "reference":
+        _set_reference(factory, id, change[2], change[3])
+    elif op == "add":
+        _remove(factory, id, change[2], change[3])
+    elif op == "remove":
+        _add(factory, id, change[2], change[3])
+
+
+class UndoJournal(Service):
+    """
+    Keep the undo history of a model on disk.
+    """
+
+    def __init__(self, event_manager, element_factory, undo_manager, properties):
+        self.event_manager = event_manager
+        self.element_factory = element_factory
+        self.undo_manager = undo_manager
+        self.enabled = properties("undo-journal", False)
+        self._writer = None
+        self._changes = None
+
+        event_manager.subscribe(self._on_file_loaded)
+        event_manager.subscribe(self._on_file_saved)
+        event_manager.subscribe(self._on_model_factory)
+        event_manager.subscribe(self._begin)
+        event_manager.subscribe(self._commit)
+        event_manager.subscribe(self._element_create)
+        event_manager.subscribe(self._element_delete)
+        event_manager.subscribe(self._attribute_change)
+        event_manager.subscribe(self._association_set)
+        event_manager.subscribe(self._association_add)
+        event_manager.subscribe(self._association_delete)
+
+    def shutdown(self):
+        self.close()
+        self.event_manager.unsubscribe(self._on_file_loaded)
+        self.event_manager.unsubscribe(self._on_file_saved)
+        self.event_manager.unsubscribe(self._on_model_factory)
+        self.event_manager.unsubscribe(self._begin)
+        self.event_manager.unsubscribe(self._commit)
+        self.event_manager.unsubscribe(self._element_create)
+        self.event_manager.unsubscribe(self._element_delete)
+        self.event_manager.unsubscribe(self._attribute_change)
+        self.event_manager.unsubscribe(self._association_set)
+        self.event_manager.unsubscribe(self._association_add)
+        self.event_manager.unsubscribe(self._association_delete)
+
+    def open(self, filename, recover=True):
+        """
+        Open the journal of model file `filename`: recover unsaved changes,
+        restore them as undo history and start journaling.
+
+        If `recover` is False, unsaved changes in the journal are discarded,
+        e.g. because they have been recovered otherwise.
+        """
+        self.close()
+        stamp, pending = read_journal(journal_filename(filename))
+        if stamp != model_stamp(filename):
+            if pending:
+                logger.warning(
+                    f"Ignoring journal {journal_filename(filename)}, "
+                    "it does not belong to this version of the model"
+                )
+            self._start(filename)
+            return
+        if not recover:
+            self._start(filename)
+            return
+
+        factory = self.element_factory
+        for changes in pending:
+            for change in changes:
+                try:
+                    redo_change(factory, change)
+                except Exception:
+                    logger.error(f"Could not recover change {change}", exc_info=True)
+        for changes in pending:
+            transaction = ActionStack()
+            for change in changes:
+                transaction.add(partial(undo_change, factory, change))
+            self.undo_manager.push_undo_transaction(transaction)
+        self._writer = JournalWriter(journal_filename(filename))
+
+    def _start(self, filename):
+        """
+        Start a new journal for the model, as saved in file `filename`.
+        """
+        if self._writer:
+            self._writer.close()
+        self._writer = JournalWriter(journal_filename(filename), truncate=True)
+        self._writer.append(saved_marker(filename))
+
+    def close(self):
+        """
+        Stop journaling. Unsaved changes are discarded.
+        """
+        if self._writer:
+            self._writer.append(CLOSED)
+            self._writer.close()
+            self._writer = None
+        self._changes = None
+
+    def flush(self):
+        if self._writer:
+            self._writer.flush()
+
+    @event_handler(FileLoaded)
+    def _on_file_loaded(self, event):
+        # Changes recovered from an autosave file are not replayed again
+        if self.enabled:
+            self.open(event.filename, recover=not event.recovered)
+
+    @event_handler(FileSaved)
+    def _on_file_saved(self, event):
+        # Saved changes are part of the model file, the journal starts over
+        if self.enabled:
+            self._start(event.filename)
+
+    @event_handler(ModelFactoryEvent)
+    def _on_model_factory(self, event):
+        self.close()
+
+    @event_handler(TransactionBegin)
+    def _begin(self, event):
+        # Keep the changes of a rolled back transaction: the changes made
+        # to revert it are recorded in the same list.
+        if self._writer and self._changes is None:
+            self._changes = []
+
+    @event_handler(TransactionCommit, TransactionRollback)
+    def _commit(self, event):
+        if self._changes:
+            self._writer.append(self._changes)
+        self._changes = None
+
+    @event_handler(ElementCreateEvent)
+    def _element_create(self, event):
+        element = event.element
+        if self._changes is not None and event.service and is_journaled(element):
+            self._changes.append(["create", element.id, type(element).__name__])
+
+    @event_handler(ElementDeleteEvent)
+    def _element_delete(self, event):
+        element = event.element
+        if self._changes is not None and event.service and is_journaled(element):
+            self._changes.append(
+                [
+                    "delete",
+                    element.id,
+                    type(element).__name__,
+                    attribute_values(element),
+                ]
+            )
+
+    @event_handler(AttributeChangeEvent)
+    def _attribute_change(self, event):
+        element = event.element
+        if self._changes is not None and is_journaled(element):
+            self._changes.append(
+                [
+                    "attribute",
+                    element.id,
+                    event.property.name,
+                    event.old_value,
+                    event.new_value,
+                ]
+            )
+
+    def _association(self, event, op, *values):
+        element = event.element
+        if (
+            self._changes is not None
+            and type(event.property) is association_property
+            and is_journaled(element)
+            and all(v is None or is_journaled(v) for v in values)
+        ):
+            self._changes.append(
+                [op, element.id, event.property.name]
+                + [v.id if v else None for v in values]
+            )
+
+    @event_handler(AssociationSetEvent)
+    def _association_set(self, event):
+        self._association(event, "reference", event.old_value, event.new_value)
+
+    @event_handler(AssociationAddEvent)
+    def _association_add(self, event):
+        self._association(event, "add", event.new_value)
+
+    @event_handler(AssociationDeleteEvent)
+    def _association_delete(self, event):
+        self._association(event, "remove", event.old_value)
@@ -13,8 +13,11 @@ NOTE: it would be nice to use actions in conjunction with functools.partial.
 """
 
 import logging
-from gaphas import state
+import sys
 
+from gaphas import state
+from gaphas.item import Item
+from gaphas.matrix import Matrix
 
 from gaphor.UML.event import (
     ElementCreateEvent,
@@ -40,6 +43,96 @@ from gaphor.transaction import Transaction, transactional
 
 logger = logging.getLogger(__name__)
 
+# Memory budget for both the undo and the redo stack
+DEFAULT_STACK_BYTES = 32 * 1024 * 1024
+
+
+def _keep_oldest(kw, newer):
+    pass
+
+
+def _add_translation(kw, newer):
+    kw["tx"] += newer["tx"]
+    kw["ty"] += newer["ty"]
+
+
+def _add_rotation(kw, newer):
+    kw["radians"] += newer["radians"]
+
+
+def _multiply_scale(kw, newer):
+    kw["sx"] *= newer["sx"]
+    kw["sy"] *= newer["sy"]
+
+
+# How to merge two subsequent gaphas undo statements on the same object.
+# The reverse statements are executed in reverse order, so the first
+# (oldest) statement recorded is the one that is applied last.
+_saveapply_merges = {
+    Item.matrix.fset: _keep_oldest,
+    Matrix.translate: _add_translation,
+    Matrix.rotate: _add_rotation,
+    Matrix.scale: _multiply_scale,
+}
+
+
+# Undo records are tuples (op, element, property, value), interpreted by
+# ActionStack.execute().
+SET_ATTRIBUTE = "set-attribute"
+SET_ASSOCIATION = "set-association"
+DEL_ASSOCIATION = "del-association"
+SAVEAPPLY = "saveapply"
+
+
+def _set_attribute(element, attribute, value):
+    attribute._set(element, value)
+
+
+def _set_association(element, association, value):
+    # Tell the association it should not need to let the opposite
+    # side connect (it has it's own signal)
+    association._set(element, value, from_opposite=True)
+
+
+def _del_association(element, association, value):
+    association._del(element, value, from_opposite=True)
+
+
+def _saveapply(obj, func, kw):
+    state.saveapply(func, kw)
+
+
+_undo_ops = {
+    SET_ATTRIBUTE: _set_attribute,
+    SET_ASSOCIATION: _set_association,
+    DEL_ASSOCIATION: _del_association,
+    SAVEAPPLY: _saveapply,
+}
+
+
+def estimate_size(action):
+    """
+    Estimate the memory retained by an undo action: the record and its
+    value, or the callable and the objects (shallowly) referenced from its
+    closure.
+    """
+    size = sys.getsizeof(action)
+    if type(action) is tuple:
+        values = action[3:]
+    else:
+        values = []
+        for cell in getattr(action, "__closure__", None) or ():
+            try:
+                values.append(cell.cell_contents)
+            except ValueError:
+                # Empty cell
+                pass
+    for value in values:
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(map(sys.getsizeof, value.values()))
+    return size
+
 
 class ActionStack:
     """
@@ -48,23 +141,55 @@ class ActionStack:
     be played back when a transaction is executed. This executing a
     transaction has the effect of performing the actions recorded, which will
     typically undo actions performed by the user.
+
+    Actions are either callables or undo records: tuples of
+    (op, element, property, value).
+
+    Redundant actions are compacted while they're recorded: of actions
+    added with the same key only the first (restoring the oldest state) is
+    kept and subsequent gaphas matrix updates on one item are merged.
     """
 
     def __init__(self):
         self._actions = []
-
-    def add(self, action):
+        self._keys = set()
+        self._last_saveapply = {}
+        self.size = 0
+
+    def add(self, action, key=None):
+        if key is not None:
+            if key in self._keys:
+                return
+            self._keys.add(key)
         self._actions.append(action)
+        self.size += estimate_size(action)
+
+    def add_saveapply(self, func, kw):
+        """
+        Add a gaphas undo statement, ``state.saveapply(func, kw)``.
+        """
+        obj_id = id(kw.get("self"))
+        last = self._last_saveapply.get(obj_id)
+        merge = _saveapply_merges.get(func)
+        if merge and last and last[0] is func:
+            merge(last[1], kw)
+            return
+        # kw refers to the object, so the id is stable for this transaction
+        self._last_saveapply[obj_id] = (func, kw)
+        self.add((SAVEAPPLY, kw.get("self"), func, kw))
 
     def can_execute(self):
         return self._actions and True or False
 
     @transactional
     def execute(self):
-        self._actions.reverse()
-        for action in self._actions:
+        for action in reversed(self._actions):
             try:
-                action()
+                if type(action) is tuple:
+                    op, element, prop, value = action
+                    _undo_ops[op](element, prop, value)
+                else:
+                    action()
             except Exception as e:
                 logger.error(f"Error while undoing action {action}", exc_info=True)
 
@@ -110,11 +235,16 @@ class UndoManager(Service, ActionProvider):
       </ui>
     """
 
-    def __init__(self, event_manager):
+    def __init__(self, event_manager, properties=None):
         self.event_manager = event_manager
         self._undo_stack = []
         self._redo_stack = []
         self._stack_depth = 20
+        self._stack_bytes = (
+            properties("undo-stack-bytes", DEFAULT_STACK_BYTES)
+            if properties
+            else DEFAULT_STACK_BYTES
+        )
         self._current_transaction = None
         self.action_group = build_action_group(self)
 
@@ -157,12 +287,16 @@ class UndoManager(Service, ActionProvider):
         assert not self._current_transaction
         self._current_transaction = ActionStack()
 
-    def add_undo_action(self, action):
+    def add_undo_action(self, action, key=None):
         """
-        Add an action to undo. An action
+        Add an action to undo. An action is either a callable or an undo
+        record (see ActionStack).
+
+        If a key is provided, only the first action with that key is
+        retained in the transaction.
         """
         if self._current_transaction:
-            self._current_transaction.add(action)
+            self._current_transaction.add(action, key)
             self.event_manager.handle(UndoManagerStateChanged(self))
 
             # TODO: should this be placed here?
@@ -176,14 +310,24 @@ class UndoManager(Service, ActionProvider):
             # Here:
             self.clear_redo_stack()
             self._undo_stack.append(self._current_transaction)
-            while len(self._undo_stack) > self._stack_depth:
-                del self._undo_stack[0]
+            self._trim_stack(self._undo_stack)
 
         self._current_transaction = None
 
         self.event_manager.handle(UndoManagerStateChanged(self))
         self._action_executed()
 
+    def push_undo_transaction(self, transaction):
+        """
+        Add a transaction that was recorded elsewhere (e.g. restored from a
+        journal) to the undo stack.
+        """
+        self._undo_stack.append(transaction)
+        self._trim_stack(self._undo_stack)
+
+        self.event_manager.handle(UndoManagerStateChanged(self))
+        self._action_executed()
+
     @event_handler(TransactionRollback)
     def rollback_transaction(self, event=None):
         """
@@ -242,8 +386,7 @@ class UndoManager(Service, ActionProvider):
                 self._redo_stack.extend(self._undo_stack)
             self._undo_stack = undo_stack
 
-        while len(self._redo_stack) > self._stack_depth:
-            del self._redo_stack[0]
+        self._trim_stack(self._redo_stack)
 
         self.event_manager.handle(UndoManagerStateChanged(self))
         self._action_executed()
@@ -265,6 +408,18 @@ class UndoManager(Service, ActionProvider):
         self.event_manager.handle(UndoManagerStateChanged(self))
         self._action_executed()
 
+    def _trim_stack(self, stack):
+        """
+        Drop the oldest transactions from stack until it fits both the stack
+        depth and the memory budget. The most recent transaction is always
+        retained.
+        """
+        size = sum(tx.size for tx in stack)
+        while len(stack) > 1 and (
+            len(stack) > self._stack_depth or size > self._stack_bytes
+        ):
+            size -= stack.pop(0).size
+
     def in_transaction(self):
         return self._current_transaction is not None
 
@@ -284,7 +439,10 @@ class UndoManager(Service, ActionProvider):
     ##
 
     def _gaphas_undo_handler(self, event):
-        self.add_undo_action(lambda: state.saveapply(*event))
+        if self._current_transaction:
+            self._current_transaction.add_saveapply(*event)
+            self.event_manager.handle(UndoManagerStateChanged(self))
+            self._action_executed()
 
     def _register_undo_handlers(self):
 
@@ -327,10 +485,8 @@ class UndoManager(Service, ActionProvider):
         element = event.element
 
         def _undo_create_event():
-            try:
-                del factory._elements[element.id]
-            except KeyError:
-                pass  # Key was probably already removed in an unlink call
+            # The element may have been removed already by an unlink() call
+            factory._unlink_element(element)
             self.event_manager.handle(ElementDeleteEvent(factory, element))
 
         self.add_undo_action(_undo_create_event)
@@ -345,66 +501,43 @@ class UndoManager(Service, ActionProvider):
         assert factory, f"No factory defined for {element} ({factory})"
 
         def _undo_delete_event():
-            factory._elements[element.id] = element
+            factory._register_element(element)
             self.event_manager.handle(ElementCreateEvent(factory, element))
 
         self.add_undo_action(_undo_delete_event)
 
     @event_handler(AttributeChangeEvent)
     def undo_attribute_change_event(self, event):
-        attribute = event.property
         element = event.element
-        value = event.old_value
-
-        def _undo_attribute_change_event():
-            attribute._set(element, value)
-
-        self.add_undo_action(_undo_attribute_change_event)
+        attribute = event.property
+        self.add_undo_action(
+            (SET_ATTRIBUTE, element, attribute, event.old_value),
+            key=(element, attribute),
+        )
 
     @event_handler(AssociationSetEvent)
     def undo_association_set_event(self, event):
         association = event.property
         if type(association) is not association_property:
             return
-        element = event.element
-        value = event.old_value
-        # print 'got new set event', association, element, value
-        def _undo_association_set_event():
-            # print 'undoing action', element, value
-            # Tell the association it should not need to let the opposite
-            # side connect (it has it's own signal)
-            association._set(element, value, from_opposite=True)
-
-        self.add_undo_action(_undo_association_set_event)
+        self.add_undo_action(
+            (SET_ASSOCIATION, event.element, association, event.old_value)
+        )
 
     @event_handler(AssociationAddEvent)
     def undo_association_add_event(self, event):
         association = event.property
         if type(association) is not association_property:
             return
-        element = event.element
-        value = event.new_value
-
-        def _undo_association_add_event():
-            # print 'undoing action', element, value
-            # Tell the association it should not need to let the opposite
-            # side connect (it has it's own signal)
-            association._del(element, value, from_opposite=True)
-
-        self.add_undo_action(_undo_association_add_event)
+        self.add_undo_action(
+            (DEL_ASSOCIATION, event.element, association, event.new_value)
+        )
 
     @event_handler(AssociationDeleteEvent)
     def undo_association_delete_event(self, event):
         association = event.property
         if type(association) is not association_property:
             return
-        element = event.element
-        value = event.old_value
-
-        def _undo_association_delete_event():
-            # print 'undoing action', element, value
-            # Tell the assoctaion it should not need to let the opposite
-            # side connect (it has it's own signal)
-            association._set(element, value, from_opposite=True)
-
-        self.add_undo_action(_undo_association_delete_event)
+        self.add_undo_action(
+            (SET_ASSOCIATION, event.element, association, event.old_value)
+        )
@@ -28,12 +28,21 @@ class name in the gaphor.diagram module.
 
 The generator parse_generator(filename, loader) may be used if the loading
 takes a long time. The yielded values are the percentage of the file read.
+parse_threaded(filename, loader) does the same, but parses the file in a
+worker thread, so the caller (e.g. the GTK main loop) is free to do other
+work in the mean time.
+
+By default files are read with expat directly. The (slower) xml.sax based
+parser can be selected with backend="sax".
 """
 
 __all__ = ["parse", "ParserException"]
 
 import io
 import os
+import queue
+import threading
+from xml.parsers import expat
 from xml.sax import handler
 from collections import OrderedDict
 
@@ -153,25 +162,22 @@ class GaphorLoader(handler.ContentHandler):
         self.version = None
         self.gaphor_version = None
         self.elements = OrderedDict()  # map id: element/canvasitem
+        self.deleted = []  # ids of deleted elements, for deltas
         self.__stack = []
-        self.text = ""
+        self.text = []  # text chunks of the current <val> tag
 
     def endDocument(self):
         if len(self.__stack) != 0:
             raise ParserException("Invalid XML document.")
 
     def startElement(self, name, attrs):
-        self.text = ""
-
         state = self.state()
 
         # Read a element class. The name of the tag is the class name:
         if state == GAPHOR:
             id = attrs["id"]
             e = element(id, name)
-            assert id not in list(self.elements.keys()), "%s already defined" % (
-                id
-            )  # , self.elements[id])
+            assert id not in self.elements, f"{id} already defined"
             self.elements[id] = e
             self.push(e, name == "Diagram" and DIAGRAM or ELEMENT)
 
@@ -185,7 +191,7 @@ class GaphorLoader(handler.ContentHandler):
         elif state in (CANVAS, ITEM) and name == "item":
             id = attrs["id"]
             c = canvasitem(id, attrs["type"])
-            assert id not in list(self.elements.keys()), f"{id} already defined"
+            assert id not in self.elements, f"{id} already defined"
             self.elements[id] = c
             self.peek().canvasitems.append(c)
             self.push(c, ITEM)
@@ -221,6 +227,7 @@ class GaphorLoader(handler.ContentHandler):
 
         # We need to get the text within the <val> tag:
         elif state == ATTR and name == "val":
+            self.text = []
             self.push(None, VAL)
 
         # The <gaphor> tag is the toplevel tag:
@@ -230,6 +237,7 @@ class GaphorLoader(handler.ContentHandler):
             self.gaphor_version = attrs.get("gaphor-version")
             if not self.gaphor_version:
                 self.gaphor_version = attrs.get("gaphor_version")
+            self.deleted = attrs.get("deleted", "").split()
             self.push(None, GAPHOR)
 
         else:
@@ -243,7 +251,8 @@ class GaphorLoader(handler.ContentHandler):
             # Two levels up: the attribute name
             n = self.peek(2)
             # Three levels up: the element instance (element or canvasitem)
-            self.peek(3).values[n] = self.text
+            self.peek(3).values[n] = "".join(self.text)
+            self.text = []
         self.pop()
 
     def startElementNS(self, name, qname, attrs):
@@ -258,33 +267,151 @@ class GaphorLoader(handler.ContentHandler):
             self.endElement(name[1])
 
     def characters(self, content):
-        """Read characters."""
-        self.text = self.text + content
+        """Read characters.
+
+        Only the content of <val> tags is of interest. The chunks are
+        collected in a list and joined once the tag is closed, so the cost
+        of reading a value stays linear in its size.
+        """
+        if self.state() == VAL:
+            self.text.append(content)
 
 
-def parse(filename):
+def parse(filename, backend="expat"):
     """Parse a file and return a dictionary ID:element/canvasitem.
     """
     loader = GaphorLoader()
 
-    for x in parse_generator(filename, loader):
+    for x in parse_generator(filename, loader, backend):
         pass
     return loader.elements
 
 
-def parse_generator(filename, loader):
+def parse_generator(filename, loader, backend="expat"):
     """The generator based version of parse().
     parses the file filename and load it with ContentHandler loader.
+
+    Two parser backends are available: "expat" (the default) drives the
+    loader directly from ``xml.parsers.expat``, reading the file in large
+    blocks. "sax" uses the generic ``xml.sax`` namespace aware parser.
+    Both build the same element and canvasitem records.
     """
     assert isinstance(loader, GaphorLoader), "loader should be a GaphorLoader"
-    from xml.sax import make_parser
 
-    parser = make_parser()
+    if backend == "expat":
+        parser = ExpatParser(loader)
+        block_size = EXPAT_BLOCK_SIZE
+    elif backend == "sax":
+        from xml.sax import make_parser
+
+        parser = make_parser()
+
+        parser.setFeature(handler.feature_namespaces, 1)
+        parser.setContentHandler(loader)
+        block_size = SAX_BLOCK_SIZE
+    else:
+        raise ValueError(f"Unknown parser backend {backend}")
+
+    yield from parse_file(filename, parser, block_size)
+
+
+def parse_threaded(filename, loader, backend="expat", interval=0.05):
+    """Like parse_generator(), but the file is parsed in a worker thread.
+
+    The generator yields the percentage of the file read, as reported by the
+    worker. If the worker made no progress within ``interval`` seconds,
+    None is yielded, so the caller can handle other events. Exceptions
+    raised while parsing are re-raised by the generator.
+
+    The loader is filled by the worker thread. It should not be used before
+    the generator is exhausted.
+    """
+    progress = queue.Queue()
+    done = object()
+
+    def parse_worker():
+        try:
+            for percentage in parse_generator(filename, loader, backend):
+                progress.put(percentage)
+        except Exception as e:
+            progress.put(e)
+        else:
+            progress.put(done)
+
+    worker = threading.Thread(target=parse_worker, name="parser", daemon=True)
+    worker.start()
+
+    while True:
+        try:
+            messages = [progress.get(timeout=interval)]
+        except queue.Empty:
+            yield None
+            continue
+
+        while not progress.empty():
+            messages.append(progress.get_nowait())
+
+        # Only report the latest progress
+        percentages = [m for m in messages if isinstance(m, (int, float))]
+        if percentages:
+            yield percentages[-1]
+
+        last = messages[-1]
+        if last is done:
+            break
+        if isinstance(last, Exception):
+            worker.join()
+            raise last
+
+    worker.join()
+
+
+SAX_BLOCK_SIZE = 512
+EXPAT_BLOCK_SIZE = 64 * 1024
 
-    parser.setFeature(handler.feature_namespaces, 1)
-    parser.setContentHandler(loader)
 
-    yield from parse_file(filename, parser)
+class ExpatParser:
+    """Feed a GaphorLoader straight from an expat parser.
+
+    This avoids the overhead of the SAX driver, which wraps every name
+    and attribute set in namespace aware objects. Like the SAX parser it
+    implements ``feed()`` and ``close()``, so it can be used with
+    ``parse_file()``.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._parser = expat.ParserCreate(namespace_separator=" ")
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = loader.characters
+        loader.startDocument()
+
+    def _start_element(self, name, attrs):
+        uri, _, name = name.rpartition(" ")
+        if not uri or uri == XMLNS:
+            self._loader.startElement(
+                name, {key.rpartition(" ")[2]: val for key, val in attrs.items()}
+            )
+
+    def _end_element(self, name):
+        uri, _, name = name.rpartition(" ")
+        if not uri or uri == XMLNS:
+            self._loader.endElement(name)
+
+    def feed(self, data):
+        try:
+            self._parser.Parse(data, False)
+        except expat.ExpatError as e:
+            raise ParserException(f"Invalid XML: {e}")
+
+    def close(self):
+        try:
+            self._parser.Parse("", True)
+        except expat.ExpatError as e:
+            raise ParserException(f"Invalid XML: {e}")
+        self._loader.endDocument()
 
 
 class ProgressGenerator:
@@ -325,7 +452,7 @@ class ProgressGenerator:
             yield (read_size * 100) / self.file_size
 
 
-def parse_file(filename, parser):
+def parse_file(filename, parser, block_size=SAX_BLOCK_SIZE):
     """Parse the supplied file using the supplied parser.  The parser parameter
     should be a GaphorLoader instance.  The filename parameter can be an
     open file descriptor instance or the name of a file.  The progress
@@ -339,7 +466,7 @@ def parse_file(filename, parser):
         is_fd = False
         file_obj = open(filename, "r")
 
-    yield from ProgressGenerator(file_obj, parser)
+    yield from ProgressGenerator(file_obj, parser, block_size)
 
     parser.close()
 
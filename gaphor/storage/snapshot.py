@@ -0,0 +1,323 @@
+"""
+Load and save Gaphor models in a compact binary snapshot format.
+
+Snapshots contain exactly the same information as the XML model files, but
+are smaller and faster to read back. They can be converted to and from the
+XML format without loss.
+
+A snapshot records the document as written by ``storage.save_generator()``:
+a stream of start tag, end tag and text records. All tag names and attribute
+values (type names, property names and ids) are stored in an interned string
+table, which is built up while writing. Numbers are encoded as unsigned
+LEB128 varints:
+
+    snapshot := MAGIC record*
+    record   := START string count (string string)*   -- tag, attributes
+              | END
+              | TEXT length utf-8-bytes
+    string   := index                  -- a string already in the table
+              | index length utf-8-bytes  -- index == table size: new entry
+
+The following functions are exported:
+
+save(out, factory)
+    store the model in a binary stream
+load(filename, factory)
+    load a model from a snapshot file
+xml_to_snapshot(filename, out)
+    convert a XML model file to a snapshot
+snapshot_to_xml(filename, writer)
+    convert a snapshot to XML, using a XMLWriter
+"""
+
+__all__ = ["load", "save", "xml_to_snapshot", "snapshot_to_xml"]
+
+import io
+import logging
+import os.path
+from xml.sax import handler
+
+from gaphor.storage import parser, storage
+
+MAGIC = b"GAPHOR-SNAPSHOT\x01"
+
+START = 1
+END = 2
+TEXT = 3
+
+# Flush the buffer to the output stream when it grows beyond this size:
+FLUSH_SIZE = 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+class SnapshotFormatError(Exception):
+    pass
+
+
+class SnapshotWriter(handler.ContentHandler):
+    """Write a snapshot. This class implements the same (SAX) content
+    handler methods as ``gaphor.misc.xmlwriter.XMLWriter``, so it can be
+    passed to ``storage.save_generator()``.
+    """
+
+    def __init__(self, out):
+        handler.ContentHandler.__init__(self)
+        self._out = out
+        self._buffer = bytearray()
+        self._strings = {}
+
+    def _varint(self, value):
+        buffer = self._buffer
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def _string(self, value):
+        strings = self._strings
+        try:
+            self._varint(strings[value])
+        except KeyError:
+            index = strings[value] = len(strings)
+            self._varint(index)
+            self._bytes(value)
+
+    def _bytes(self, value):
+        data = value.encode("utf-8")
+        self._varint(len(data))
+        self._buffer += data
+
+    def _flush(self):
+        self._out.write(self._buffer)
+        self._buffer = bytearray()
+
+    def startDocument(self):
+        self._buffer += MAGIC
+
+    def endDocument(self):
+        self._flush()
+
+    def startElement(self, name, attrs):
+        self._buffer.append(START)
+        self._string(name)
+        self._varint(len(attrs))
+        for key, value in attrs.items():
+            self._string(key)
+            self._string(value)
+
+    def endElement(self, name):
+        self._buffer.append(END)
+        if len(self._buffer) > FLUSH_SIZE:
+            self._flush()
+
+    def startElementNS(self, name, qname, attrs):
+        # Only the Gaphor model namespace is used, drop the namespace URI's
+        self.startElement(name[1], {key[1]: value for key, value in attrs.items()})
+
+    def endElementNS(self, name, qname):
+        self.endElement(name[1])
+
+    def characters(self, content):
+        self._buffer.append(TEXT)
+        self._bytes(content)
+
+
+def replay_generator(data, content_handler):
+    """Replay a snapshot (``bytes``) on a SAX content handler, such as a
+    ``GaphorLoader`` or a ``XMLWriter``. This function is a generator. It
+    will yield values from 0 to 100 (%) to indicate its progression.
+    """
+    if not data.startswith(MAGIC):
+        raise SnapshotFormatError("Not a Gaphor snapshot")
+
+    pos = len(MAGIC)
+    size = len(data)
+    strings = []
+    names = []
+
+    def varint():
+        nonlocal pos
+        result = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def text():
+        nonlocal pos
+        length = varint()
+        value = data[pos : pos + length].decode("utf-8")
+        pos += length
+        return value
+
+    def string():
+        index = varint()
+        if index == len(strings):
+            strings.append(text())
+        return strings[index]
+
+    content_handler.startDocument()
+    content_handler.startPrefixMapping("", storage.NAMESPACE_MODEL)
+    n = 0
+    try:
+        while pos < size:
+            record = data[pos]
+            pos += 1
+            if record == START:
+                name = string()
+                attrs = {}
+                for _ in range(varint()):
+                    key = string()
+                    attrs[key] = string()
+                if names:
+                    content_handler.startElement(name, attrs)
+                else:
+                    content_handler.startElementNS(
+                        (storage.NAMESPACE_MODEL, name),
+                        None,
+                        {(storage.NAMESPACE_MODEL, k): v for k, v in attrs.items()},
+                    )
+                names.append(name)
+            elif record == END:
+                name = names.pop()
+                if names:
+                    content_handler.endElement(name)
+                else:
+                    content_handler.endElementNS(
+                        (storage.NAMESPACE_MODEL, name), None
+                    )
+            elif record == TEXT:
+                content_handler.characters(text())
+            else:
+                raise SnapshotFormatError(f"Invalid record type {record} at {pos}")
+
+            n += 1
+            if n % 1000 == 0:
+                yield (pos * 100) / size
+    except (IndexError, UnicodeDecodeError) as e:
+        raise SnapshotFormatError(f"Truncated or corrupt snapshot: {e}")
+
+    if names:
+        raise SnapshotFormatError("Truncated snapshot")
+    content_handler.endPrefixMapping("")
+    content_handler.endDocument()
+    yield 100
+
+
+def read(filename):
+    """Read the contents of a snapshot, from a file name or a binary file
+    object."""
+    if isinstance(filename, io.IOBase):
+        return filename.read()
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def save(out, factory, status_queue=None):
+    for status in save_generator(out, factory):
+        if status_queue:
+            status_queue(status)
+
+
+def save_generator(out, factory):
+    """
+    Save the current model as snapshot in the binary file object @out.
+    """
+    yield from storage.save_generator(SnapshotWriter(out), factory)
+
+
+def load(filename, factory, status_queue=None):
+    """
+    Load a snapshot file and create a model if possible.
+    Optionally, a status queue function can be given, to which the
+    progress is written (as status_queue(progress)).
+    """
+    for status in load_generator(filename, factory):
+        if status_queue:
+            status_queue(status)
+
+
+def load_generator(filename, factory):
+    """
+    Load a snapshot file and create a model if possible.
+    This function is a generator. It will yield values from 0 to 100 (%)
+    to indicate its progression.
+    """
+    if isinstance(filename, io.IOBase):
+        log.info("Loading snapshot from file descriptor")
+    else:
+        log.info("Loading snapshot %s" % os.path.basename(filename))
+
+    try:
+        loader = parser.GaphorLoader()
+        for percentage in replay_generator(read(filename), loader):
+            yield percentage / 2
+    except Exception as e:
+        log.error("Snapshot could no be read", exc_info=True)
+        raise
+
+    for percentage in storage.load_model_generator(
+        loader.elements, factory, loader.gaphor_version
+    ):
+        yield percentage / 2 + 50
+
+
+class _ValueFilter(handler.ContentHandler):
+    """Pass the events of a parsed XML model file on to a snapshot writer.
+
+    Whitespace between tags is dropped, only text in <val> tags is
+    relevant. Empty values are passed on as empty text, like
+    ``storage.save_generator()`` does.
+    """
+
+    def __init__(self, writer):
+        handler.ContentHandler.__init__(self)
+        self._writer = writer
+        self._in_val = False
+        self._text = []
+
+    def startDocument(self):
+        self._writer.startDocument()
+
+    def endDocument(self):
+        self._writer.endDocument()
+
+    def startElementNS(self, name, qname, attrs):
+        if name[0] not in (None, "", storage.NAMESPACE_MODEL):
+            raise SnapshotFormatError(f"Unknown namespace {name[0]}")
+        self._writer.startElementNS(name, qname, dict(attrs.items()))
+        self._in_val = name[1] == "val"
+        self._text = []
+
+    def endElementNS(self, name, qname):
+        if self._in_val:
+            self._writer.characters("".join(self._text))
+            self._in_val = False
+        self._writer.endElementNS(name, qname)
+
+    def characters(self, content):
+        if self._in_val:
+            self._text.append(content)
+
+
+def xml_to_snapshot(filename, out):
+    """Convert a XML model file (file name or file object) to a snapshot,
+    written to the binary file object @out."""
+    from xml.sax import make_parser
+
+    xml_parser = make_parser()
+    xml_parser.setFeature(handler.feature_namespaces, 1)
+    xml_parser.setContentHandler(_ValueFilter(SnapshotWriter(out)))
+    for _ in parser.parse_file(filename, xml_parser, parser.EXPAT_BLOCK_SIZE):
+        pass
+
+
+def snapshot_to_xml(filename, writer):
+    """Convert a snapshot (file name or binary file object) to XML, using
+    @writer, which is a gaphor.misc.xmlwriter.XMLWriter instance."""
+    for _ in replay_generator(read(filename), writer):
+        pass
@@ -31,16 +31,20 @@ NAMESPACE_MODEL = "http://gaphor.sourceforge.net/model"
 log = logging.getLogger(__name__)
 
 
-def save(writer=None, factory=None, status_queue=None):
-    for status in save_generator(writer, factory):
+def save(writer=None, factory=None, status_queue=None, elements=None, deleted=None):
+    for status in save_generator(writer, factory, elements, deleted):
         if status_queue:
             status_queue(status)
 
 
-def save_generator(writer, factory):
+def save_generator(writer, factory, elements=None, deleted=None):
     """
     Save the current model using @writer, which is a
     gaphor.misc.xmlwriter.XMLWriter instance.
+
+    If @elements is provided, only those elements are saved, together
+    with the ids of the @deleted elements. Such a delta can be loaded on
+    top of the model file it was made for (see load_generator()).
     """
 
     # Maintain a set of id's, one for elements, one for references.
@@ -138,20 +142,22 @@ def save_generator(writer, factory):
         else:
             save_value(name, value)
 
+    attrs = {
+        (NAMESPACE_MODEL, "version"): FILE_FORMAT_VERSION,
+        (NAMESPACE_MODEL, "gaphor-version"): Application.distribution.version,
+    }
+    if elements is None:
+        elements = factory.values()
+    else:
+        attrs[(NAMESPACE_MODEL, "deleted")] = " ".join(sorted(deleted or ()))
+
     writer.startDocument()
     writer.startPrefixMapping("", NAMESPACE_MODEL)
-    writer.startElementNS(
-        (NAMESPACE_MODEL, "gaphor"),
-        None,
-        {
-            (NAMESPACE_MODEL, "version"): FILE_FORMAT_VERSION,
-            (NAMESPACE_MODEL, "gaphor-version"): Application.distribution.version,
-        },
-    )
-
-    size = factory.size()
+    writer.startElementNS((NAMESPACE_MODEL, "gaphor"), None, attrs)
+
+    size = len(elements)
     n = 0
-    for e in list(factory.values()):
+    for e in list(elements):
         clazz = e.__class__.__name__
         assert e.id
         writer.startElement(clazz, {"id": str(e.id)})
@@ -287,7 +293,7 @@ def load_elements_generator(elements, factory, gaphor_version):
     # Data model, loaded from file, is updated automatically, so there is
     # no need for special function.
 
-    for d in factory.select(lambda e: isinstance(e, UML.Diagram)):
+    for d in factory.select_type(UML.Diagram):
         # update_now() is implicitly called when lock is released
         d.canvas.block_updates = False
 
@@ -299,23 +305,34 @@ def load_elements_generator(elements, factory, gaphor_version):
         elem.element.postload()
 
 
-def load(filename, factory, status_queue=None):
+def load(filename, factory, status_queue=None, backend="expat"):
     """
     Load a file and create a model if possible.
     Optionally, a status queue function can be given, to which the
     progress is written (as status_queue(progress)).
+    The parser backend ("expat" or "sax") is passed on to the parser.
     """
-    for status in load_generator(filename, factory):
+    for status in load_generator(filename, factory, backend):
         if status_queue:
             status_queue(status)
 
 
-def load_generator(filename, factory):
+def load_generator(filename, factory, backend="expat", delta=None, threaded=False):
     """
     Load a file and create a model if possible.
     This function is a generator. It will yield values from 0 to 100 (%)
     to indicate its progression.
+
+    A @delta, as written by save_generator() for a subset of the elements,
+    is applied on top of the file. The elements in the delta are marked
+    dirty in the factory, since they are not part of the file.
+
+    If @threaded is set, the files are parsed in a worker thread. While
+    waiting for the parser, None is yielded. Only the model is built from
+    the calling thread, in small steps.
     """
+    parse = parser.parse_threaded if threaded else parser.parse_generator
+
     if isinstance(filename, io.IOBase):
         log.info("Loading file from file descriptor")
     else:
@@ -323,8 +340,7 @@ def load_generator(filename, factory):
     try:
         # Use the incremental parser and yield the percentage of the file.
         loader = parser.GaphorLoader()
-        for percentage in parser.parse_generator(filename, loader):
-            pass
+        for percentage in parse(filename, loader, backend):
             if percentage:
                 yield percentage / 2
             else:
@@ -332,10 +348,67 @@ def load_generator(filename, factory):
         elements = loader.elements
         gaphor_version = loader.gaphor_version
 
+        if delta is not None:
+            delta_loader = parser.GaphorLoader()
+            for percentage in parse(delta, delta_loader, backend):
+                yield None
+            merge_delta(elements, delta_loader.elements, delta_loader.deleted)
+
     except Exception as e:
         log.error("File could no be parsed", exc_info=True)
         raise
 
+    try:
+        for percentage in load_model_generator(elements, factory, gaphor_version):
+            if percentage:
+                yield percentage / 2 + 50
+            else:
+                yield percentage
+    except Exception as e:
+        log.warning(f"file {filename} could not be loaded", e)
+        raise
+
+    if delta is not None:
+        for id in delta_loader.elements:
+            element = factory.lookup(id)
+            if element:
+                factory.mark_dirty(element)
+        for id in delta_loader.deleted:
+            factory.mark_deleted(id)
+
+
+def merge_delta(elements, delta_elements, deleted):
+    """
+    Apply the element records of a delta to the records parsed from the
+    model file. Records are replaced as a whole. A diagram record includes
+    its canvas items, so the items of the replaced diagram are dropped.
+    """
+
+    def drop_canvasitems(canvasitems):
+        for item in canvasitems:
+            elements.pop(item.id, None)
+            drop_canvasitems(item.canvasitems)
+
+    def drop(id):
+        elem = elements.pop(id, None)
+        if isinstance(elem, parser.element) and elem.canvas is not None:
+            drop_canvasitems(elem.canvas.canvasitems)
+
+    for id in deleted:
+        drop(id)
+    for id, elem in delta_elements.items():
+        if isinstance(elem, parser.element):
+            drop(id)
+    elements.update(delta_elements)
+
+
+def load_model_generator(elements, factory, gaphor_version):
+    """
+    Replace the model in the factory by the parsed elements, as returned by
+    the parser module.
+    This function is a generator. It will yield values from 0 to 100 (%)
+    to indicate its progression.
+    """
     if version_lower_than(gaphor_version, (0, 17, 0)):
         raise ValueError(
             "Gaphor model version should be at least 0.17.0 (found {})".format(
@@ -348,19 +421,9 @@ def load_generator(filename, factory):
     factory.flush()
     gc.collect()
     with factory.block_events():
-        try:
-            for percentage in load_elements_generator(
-                elements, factory, gaphor_version
-            ):
-                if percentage:
-                    yield percentage / 2 + 50
-                else:
-                    yield percentage
-            gc.collect()
-            yield 100
-        except Exception as e:
-            log.warning(f"file {filename} could not be loaded", e)
-            raise
+        yield from load_elements_generator(elements, factory, gaphor_version)
+        gc.collect()
+        yield 100
     factory.notify_model()
 
 
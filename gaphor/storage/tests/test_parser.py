@@ -0,0 +1,219 @@
+"""
+Test the parser, including a regression benchmark for large models.
+"""
+
+import io
+import threading
+import time
+
+import importlib_metadata
+import pytest
+
+from gaphor.storage.parser import (
+    GaphorLoader,
+    ParserException,
+    canvas,
+    canvasitem,
+    parse,
+    parse_generator,
+    parse_threaded,
+)
+
+MODEL_FILES = [
+    "gaphor/UML/uml2.gaphor",
+    "examples/all-elements.gaphor",
+    "test-diagrams/action-issue.gaphor",
+    "test-diagrams/diagram-#4.gaphor",
+    "test-diagrams/issue_53.gaphor",
+    "test-diagrams/old-gaphor-version.gaphor",
+    "test-diagrams/simple-items.gaphor",
+    "tests/test-model.gaphor",
+]
+
+
+def generate_model(n_elements):
+    """Generate a model file with ``n_elements`` classes, each with a name,
+    a reference to the owning package and some presentation items.
+    """
+    out = io.StringIO()
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    out.write(
+        '<gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="1.1.0">\n'
+    )
+    out.write('<Package id="pkg">\n<ownedType>\n<reflist>\n')
+    for i in range(n_elements):
+        out.write(f'<ref refid="c{i}"/>\n')
+    out.write("</reflist>\n</ownedType>\n</Package>\n")
+    out.write('<Diagram id="diagram">\n<canvas>\n')
+    for i in range(0, n_elements, 10):
+        out.write(
+            f'<item id="i{i}" type="ClassItem">\n'
+            f"<matrix>\n<val>(1.0, 0.0, 0.0, 1.0, {i}.0, {i}.0)</val>\n</matrix>\n"
+            f'<subject>\n<ref refid="c{i}"/>\n</subject>\n'
+            "</item>\n"
+        )
+    out.write("</canvas>\n</Diagram>\n")
+    for i in range(n_elements):
+        out.write(
+            f'<Class id="c{i}">\n'
+            f"<name>\n<val>Class &lt;{i}&gt; with a somewhat longer name</val>\n</name>\n"
+            '<package>\n<ref refid="pkg"/>\n</package>\n'
+            "</Class>\n"
+        )
+    out.write("</gaphor>\n")
+    out.seek(0)
+    return out
+
+
+def test_parse_generated_model():
+    elements = parse(generate_model(100))
+
+    assert len(elements) == 100 + 2 + 10
+    assert elements["c42"].type == "Class"
+    assert elements["c42"].values["name"] == "Class <42> with a somewhat longer name"
+    assert elements["c42"].references["package"] == "pkg"
+    assert len(elements["pkg"].references["ownedType"]) == 100
+
+    canvas = elements["diagram"].canvas
+    assert len(canvas.canvasitems) == 10
+    assert isinstance(elements["i10"], canvasitem)
+    assert elements["i10"].values["matrix"] == "(1.0, 0.0, 0.0, 1.0, 10.0, 10.0)"
+    assert elements["i10"].references["subject"] == "c10"
+
+
+def test_whitespace_outside_values_is_ignored():
+    elements = parse(generate_model(1))
+
+    assert elements["pkg"].values == {}
+
+
+def as_tuple(record):
+    """Turn a parsed record in a structure that can be compared."""
+    if isinstance(record, canvas):
+        return (record.values, record.references, record_list(record.canvasitems))
+    canvas_or_items = (
+        record_list(record.canvasitems)
+        if isinstance(record, canvasitem)
+        else record.canvas and as_tuple(record.canvas)
+    )
+    return (
+        type(record),
+        record.id,
+        record.type,
+        record.values,
+        record.references,
+        canvas_or_items,
+    )
+
+
+def record_list(records):
+    return [as_tuple(r) for r in records]
+
+
+@pytest.mark.parametrize("model_file", MODEL_FILES)
+def test_backends_load_models_identically(model_file):
+    dist = importlib_metadata.distribution("gaphor")
+    path = dist.locate_file(model_file)
+
+    with open(path) as ifile:
+        sax_loader = GaphorLoader()
+        for _ in parse_generator(ifile, sax_loader, "sax"):
+            pass
+    with open(path) as ifile:
+        expat_loader = GaphorLoader()
+        progress = list(parse_generator(ifile, expat_loader, "expat"))
+
+    assert progress and progress[-1] == 100
+    assert expat_loader.gaphor_version == sax_loader.gaphor_version
+    assert list(expat_loader.elements) == list(sax_loader.elements)
+    assert record_list(expat_loader.elements.values()) == record_list(
+        sax_loader.elements.values()
+    )
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        parse(generate_model(1), backend="dom")
+
+
+def test_invalid_xml_with_expat_backend():
+    with pytest.raises(ParserException):
+        parse(
+            io.StringIO('<gaphor version="3.0"><Class id="c1"></gaphor>'),
+            backend="expat",
+        )
+
+
+def test_duplicate_element_id():
+    model = io.StringIO(
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0">\n'
+        '<Class id="c1"/>\n<Class id="c1"/>\n'
+        "</gaphor>\n"
+    )
+    with pytest.raises(AssertionError):
+        parse(model)
+
+
+def test_unknown_tag():
+    model = io.StringIO(
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0">\n'
+        '<Class id="c1">\n<name>\n<foo/>\n</name>\n</Class>\n'
+        "</gaphor>\n"
+    )
+    with pytest.raises(ParserException):
+        parse(model)
+
+
+def test_parse_threaded():
+    threads = set()
+
+    class ThreadRecordingLoader(GaphorLoader):
+        def startElement(self, name, attrs):
+            threads.add(threading.current_thread())
+            super().startElement(name, attrs)
+
+    loader = ThreadRecordingLoader()
+    progress = list(parse_threaded(generate_model(1000), loader))
+
+    assert threads and threading.current_thread() not in threads
+    assert progress[-1] == 100
+    assert record_list(loader.elements.values()) == record_list(
+        parse(generate_model(1000)).values()
+    )
+
+
+def test_parse_threaded_reraises_errors():
+    model = io.StringIO('<gaphor version="3.0"><Class id="c1"></gaphor>')
+
+    with pytest.raises(ParserException):
+        for _ in parse_threaded(model, GaphorLoader()):
+            pass
+
+
+def parse_time(n_elements, backend="expat"):
+    model = generate_model(n_elements)
+    start = time.perf_counter()
+    parse(model, backend)
+    return time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_parse_time_grows_linear():
+    """Opening a model should take time proportional to the file size.
+
+    A quadratic loader spends ~100 times as long on 100k elements as on
+    10k elements, the linear loader ~10 times. Allow for plenty of noise.
+    """
+    t10k = min(parse_time(10000) for _ in range(2))
+    t50k = parse_time(50000)
+    t100k = parse_time(100000)
+
+    assert t50k / t10k < 5 * 3, (t10k, t50k)
+    assert t100k / t10k < 10 * 3, (t10k, t100k)
+
+
+@pytest.mark.benchmark
+def test_expat_backend_is_not_slower_than_sax():
+    assert parse_time(20000, "expat") < parse_time(20000, "sax") * 1.5
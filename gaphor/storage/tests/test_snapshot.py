@@ -0,0 +1,115 @@
+"""
+Test the binary snapshot format.
+"""
+
+import io
+import re
+from io import StringIO
+
+import importlib_metadata
+import pytest
+
+from gaphor import UML
+from gaphor.diagram.classes import AssociationItem, ClassItem
+from gaphor.diagram.general import CommentItem
+from gaphor.misc.xmlwriter import XMLWriter
+from gaphor.storage import snapshot, storage
+from gaphor.tests.testcase import TestCase
+
+MODEL_FILES = [
+    "gaphor/UML/uml2.gaphor",
+    "test-diagrams/simple-items.gaphor",
+    "tests/test-model.gaphor",
+]
+
+
+@pytest.mark.parametrize("model_file", MODEL_FILES)
+def test_xml_round_trip(model_file):
+    dist = importlib_metadata.distribution("gaphor")
+    path = dist.locate_file(model_file)
+
+    data = io.BytesIO()
+    snapshot.xml_to_snapshot(path, data)
+    xml = StringIO()
+    snapshot.snapshot_to_xml(io.BytesIO(data.getvalue()), XMLWriter(xml))
+
+    with open(path) as ifile:
+        orig = ifile.read()
+
+    assert xml.getvalue() == orig
+    assert len(data.getvalue()) < len(orig.encode("utf-8")) / 2
+
+
+def test_invalid_snapshot():
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.snapshot_to_xml(io.BytesIO(b"<?xml"), XMLWriter(StringIO()))
+
+
+def test_truncated_snapshot():
+    dist = importlib_metadata.distribution("gaphor")
+    path = dist.locate_file("test-diagrams/simple-items.gaphor")
+    data = io.BytesIO()
+    snapshot.xml_to_snapshot(path, data)
+
+    truncated = io.BytesIO(data.getvalue()[:-20])
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.snapshot_to_xml(truncated, XMLWriter(StringIO()))
+
+
+class SnapshotTestCase(TestCase):
+    def save_snapshot(self):
+        data = io.BytesIO()
+        snapshot.save(data, factory=self.element_factory)
+        return data.getvalue()
+
+    def test_save_and_load(self):
+        self.element_factory.create(UML.Package)
+        self.create(CommentItem, UML.Comment)
+        self.create(ClassItem, UML.Class)
+        c = self.element_factory.lselect(lambda e: e.isKindOf(UML.Class))[0]
+        c.name = "Snapshot <&>"
+        a = self.diagram.create(AssociationItem)
+        a.handles()[1].pos = (50, 60)
+
+        data = self.save_snapshot()
+        self.element_factory.flush()
+        snapshot.load(io.BytesIO(data), factory=self.element_factory)
+
+        assert len(self.element_factory.lselect()) == 4
+        c = self.element_factory.lselect(lambda e: e.isKindOf(UML.Class))[0]
+        assert c.name == "Snapshot <&>"
+        assert c.presentation
+        d = self.element_factory.lselect(lambda e: e.isKindOf(UML.Diagram))[0]
+        assert len(d.canvas.get_all_items()) == 3
+        aa = d.canvas.select(lambda e: isinstance(e, AssociationItem))[0]
+        assert list(map(float, aa.handles()[1].pos)) == [50, 60]
+
+    def test_snapshot_converts_to_saved_xml(self):
+        self.element_factory.create(UML.Package)
+        self.create(ClassItem, UML.Class)
+
+        xml = StringIO()
+        storage.save(XMLWriter(xml), factory=self.element_factory)
+        data = self.save_snapshot()
+
+        converted = StringIO()
+        snapshot.snapshot_to_xml(io.BytesIO(data), XMLWriter(converted))
+
+        assert converted.getvalue() == xml.getvalue()
+
+    def test_load_save_model(self):
+        dist = importlib_metadata.distribution("gaphor")
+        path = dist.locate_file("test-diagrams/simple-items.gaphor")
+
+        data = io.BytesIO()
+        snapshot.xml_to_snapshot(path, data)
+        data.seek(0)
+        snapshot.load(data, factory=self.element_factory)
+
+        xml = StringIO()
+        storage.save(XMLWriter(xml), factory=self.element_factory)
+        with open(path) as ifile:
+            orig = ifile.read()
+
+        expr = re.compile('gaphor-version="[^"]*"')
+        assert expr.sub("%VER%", xml.getvalue()) == expr.sub("%VER%", orig)
@@ -6,9 +6,11 @@ import io
 import os
 import os.path
 import re
+import time
 from io import StringIO
 
 import importlib_metadata
+import pytest
 
 from gaphor import UML
 from gaphor.diagram.general import CommentItem
@@ -16,6 +18,7 @@ from gaphor.diagram.classes import AssociationItem, ClassItem, InterfaceItem
 from gaphor.misc.xmlwriter import XMLWriter
 from gaphor.storage import storage
 from gaphor.tests.testcase import TestCase
+from gaphor.transaction import Transaction
 
 
 class PseudoFile:
@@ -296,3 +299,169 @@ class StorageTestCase(TestCase):
                 storage.load(ifile, factory=self.element_factory)
 
         self.assertRaises(ValueError, load_old_model)
+
+    def create_large_model(self, n_classes):
+        package = self.element_factory.create(UML.Package)
+        for i in range(n_classes):
+            c = self.element_factory.create(UML.Class)
+            c.name = f"Class <{i}>"
+            c.package = package
+            a = self.element_factory.create(UML.Property)
+            a.name = "attr"
+            c.ownedAttribute = a
+            if i % 10 == 0:
+                self.diagram.create(ClassItem, subject=c)
+
+    def save_timed(self, elements=None, deleted=None, **kwargs):
+        out = PseudoFile()
+        start = time.perf_counter()
+        storage.save(
+            XMLWriter(out, **kwargs),
+            factory=self.element_factory,
+            elements=elements,
+            deleted=deleted,
+        )
+        return out.data, time.perf_counter() - start
+
+    def test_save_buffered(self):
+        """Buffered output is the same as unbuffered output, also if the
+        buffer is written several times.
+        """
+        self.create_large_model(200)
+
+        data, _ = self.save_timed()
+
+        assert self.save_timed(buffer_size=1024)[0] == data
+        assert self.save_timed(buffer_size=1024 * 1024)[0] == data
+
+    @pytest.mark.benchmark
+    def test_save_large_model_buffered(self):
+        """Save benchmark: buffered output should not be slower.
+        """
+        self.create_large_model(2000)
+
+        data, duration = self.save_timed()
+        buffered_data, buffered_duration = self.save_timed(buffer_size=1024 * 1024)
+
+        assert buffered_data == data
+        assert buffered_duration < duration * 1.5, (buffered_duration, duration)
+
+    def test_load_with_delta(self):
+        """Changes saved as a delta are applied on top of the model file.
+        """
+        package = self.element_factory.create(UML.Package)
+        klass = self.element_factory.create(UML.Class)
+        klass.package = package
+        removed = self.element_factory.create(UML.Class)
+        removed.package = package
+        self.create(ClassItem, UML.Class)
+
+        out = StringIO()
+        storage.save(XMLWriter(out), factory=self.element_factory)
+        data = out.getvalue()
+
+        self.element_factory.clear_dirty()
+        klass.name = "Changed"
+        removed.unlink()
+        added = self.create(CommentItem, UML.Comment)
+        added.subject.body = "Added"
+
+        elements, deleted = self.element_factory.dirty()
+        assert self.diagram in elements
+        assert removed.id in deleted
+
+        out = StringIO()
+        storage.save(
+            XMLWriter(out),
+            factory=self.element_factory,
+            elements=elements,
+            deleted=deleted,
+        )
+        delta = out.getvalue()
+        assert "<Package " in delta
+        assert '<Class id="%s"' % removed.id not in delta
+
+        self.element_factory.flush()
+        for status in storage.load_generator(
+            StringIO(data), self.element_factory, delta=StringIO(delta)
+        ):
+            pass
+
+        assert self.element_factory.lookup(klass.id).name == "Changed"
+        assert not self.element_factory.lookup(removed.id)
+        assert self.element_factory.lookup(added.subject.id).body == "Added"
+        diagram = self.element_factory.lookup(self.diagram.id)
+        assert len(diagram.canvas.get_all_items()) == 2
+        assert len(self.element_factory.lookup(package.id).ownedMember) == 1
+
+        # Changes from the delta are still to be saved
+        elements, deleted = self.element_factory.dirty()
+        assert diagram in elements
+        assert removed.id in deleted
+
+    def test_diagram_is_dirty_after_changes_only(self):
+        item = self.create(ClassItem, UML.Class)
+        self.diagram.canvas.update_now()
+        self.element_factory.clear_dirty()
+
+        # Updates outside a transaction, like redrawing, don't change it
+        item.request_update()
+        self.diagram.canvas.update_now()
+        assert self.diagram not in self.element_factory.dirty()[0]
+
+        with Transaction(self.get_service("event_manager")):
+            item.matrix.translate(10, 10)
+            self.diagram.canvas.request_matrix_update(item)
+        assert self.diagram in self.element_factory.dirty()[0]
+
+        self.element_factory.clear_dirty()
+        self.diagram.canvas.remove(item)
+        assert self.diagram in self.element_factory.dirty()[0]
+
+    def test_load_threaded(self):
+        """The file can be parsed in a worker thread, the model is still
+        built in the calling thread.
+        """
+        package = self.element_factory.create(UML.Package)
+        for i in range(100):
+            klass = self.element_factory.create(UML.Class)
+            klass.name = f"Class {i}"
+            klass.package = package
+        self.create(ClassItem, UML.Class)
+
+        out = StringIO()
+        storage.save(XMLWriter(out), factory=self.element_factory)
+
+        self.element_factory.flush()
+        progress = list(
+            storage.load_generator(
+                StringIO(out.getvalue()), self.element_factory, threaded=True
+            )
+        )
+
+        assert progress[-1] == 100
+        assert len(self.element_factory.lookup(package.id).ownedMember) == 100
+        diagram = self.element_factory.lookup(self.diagram.id)
+        assert len(diagram.canvas.get_all_items()) == 1
+
+    def test_save_delta_of_large_model(self):
+        """Saving only the changed elements is a fraction of a full save.
+        """
+        package = self.element_factory.create(UML.Package)
+        classes = []
+        for i in range(5000):
+            c = self.element_factory.create(UML.Class)
+            c.name = f"Class {i}"
+            classes.append(c)
+        self.element_factory.clear_dirty()
+
+        classes[10].name = "Changed"
+        classes[20].package = package
+
+        elements, deleted = self.element_factory.dirty()
+        assert set(elements) == {classes[10], classes[20], package}
+
+        data, _ = self.save_timed()
+        delta, _ = self.save_timed(elements=elements, deleted=deleted)
+
+        assert len(delta) < len(data) / 100
@@ -4,15 +4,22 @@ import gaphor
 from gaphor.storage import storage
 import gaphor.UML as UML
 
+from gaphas.canvas import Context
 from gaphas.painter import ItemPainter
 from gaphas.view import View
 
 import cairo
 
+from concurrent.futures import ProcessPoolExecutor
 import optparse
 import os
 import re
 import sys
+import time
+
+# Models loaded by this process, by file name. Worker processes started by
+# forking inherit the models loaded before the pool was created.
+_models = {}
 
 
 def pkg2dir(package):
@@ -26,12 +33,80 @@ def pkg2dir(package):
     return "/".join(name)
 
 
+def load_model(filename):
+    """
+    Load a model file, once per process.
+    """
+    try:
+        return _models[filename]
+    except KeyError:
+        factory = UML.ElementFactory()
+        storage.load(filename, factory)
+        _models[filename] = factory
+        return factory
+
+
+def is_up_to_date(outfilename, filename):
+    """
+    True if the output file is newer than the model file.
+    """
+    return os.path.exists(outfilename) and os.path.getmtime(
+        outfilename
+    ) >= os.path.getmtime(filename)
+
+
+def render_diagram(diagram, outfilename, format):
+    """
+    Render a diagram to a pdf, svg or png file.
+    """
+    view = View(diagram.canvas)
+    view.painter = ItemPainter()
+
+    tmpsurface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 0, 0)
+    tmpcr = cairo.Context(tmpsurface)
+    view.update_bounding_box(tmpcr)
+    tmpcr.show_page()
+    tmpsurface.flush()
+
+    w, h = view.bounding_box.width, view.bounding_box.height
+    if format == "pdf":
+        surface = cairo.PDFSurface(outfilename, w, h)
+    elif format == "svg":
+        surface = cairo.SVGSurface(outfilename, w, h)
+    elif format == "png":
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, int(w + 1), int(h + 1))
+    else:
+        assert False, f"unknown format {format}"
+    cr = cairo.Context(surface)
+    view.matrix.translate(-view.bounding_box.x, -view.bounding_box.y)
+    view.painter.paint(
+        Context(cairo=cr, items=diagram.canvas.get_all_items(), area=None)
+    )
+    cr.show_page()
+
+    if format == "png":
+        surface.write_to_png(outfilename)
+
+    surface.flush()
+    surface.finish()
+
+
+def render_job(filename, diagram_id, outfilename, format):
+    """
+    Render a diagram from a model file. Returns the time it took, in
+    seconds. This function is executed by the worker processes.
+    """
+    start = time.perf_counter()
+    diagram = load_model(filename).lookup(diagram_id)
+    render_diagram(diagram, outfilename, format)
+    return time.perf_counter() - start
+
+
 def main():
     def message(msg):
         """
         Print message if user set verbose mode.
         """
-        global options
         if options.verbose:
             print(msg, file=sys.stderr)
 
@@ -69,6 +144,22 @@ def main():
         help="process diagrams which name matches given regular expresion;"
         " name includes package name; regular expressions are case insensitive",
     )
+    parser.add_option(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        metavar="N",
+        type="int",
+        default=os.cpu_count() or 1,
+        help="number of diagrams rendered in parallel, default number of CPUs",
+    )
+    parser.add_option(
+        "-F",
+        "--force",
+        dest="force",
+        action="store_true",
+        help="also render diagrams whose output is newer than the model",
+    )
 
     (options, args) = parser.parse_args()
 
@@ -76,18 +167,20 @@ def main():
         parser.print_help()
         # sys.exit(1)
 
-    model = UML.ElementFactory()
-
     name_re = None
     if options.regex:
         name_re = re.compile(options.regex, re.I)
 
+    start = time.perf_counter()
+    rendered = skipped = failed = 0
+
     # we should have some gaphor files to be processed at this point
-    for model in args:
-        message(f"loading model {model}")
-        storage.load(model, model)
+    for filename in args:
+        message(f"loading model {filename}")
+        model = load_model(filename)
         message("\nready for rendering\n")
 
+        jobs = []
         for diagram in model.select(lambda e: e.isKindOf(UML.Diagram)):
             odir = pkg2dir(diagram.package)
 
@@ -109,39 +202,64 @@ def main():
 
             outfilename = f"{odir}/{dname}.{options.format}"
 
+            if not options.force and is_up_to_date(outfilename, filename):
+                message(f"up to date: {pname}")
+                skipped += 1
+                continue
+
             if not os.path.exists(odir):
                 message(f"creating dir {odir}")
                 os.makedirs(odir)
 
-            message(f"rendering: {pname} -> {outfilename}...")
-
-            view = View(diagram.canvas)
-            view.painter = ItemPainter()
-
-            tmpsurface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 0, 0)
-            tmpcr = cairo.Context(tmpsurface)
-            view.update_bounding_box(tmpcr)
-            tmpcr.show_page()
-            tmpsurface.flush()
-
-            w, h = view.bounding_box.width, view.bounding_box.height
-            if options.format == "pdf":
-                surface = cairo.PDFSurface(outfilename, w, h)
-            elif options.format == "svg":
-                surface = cairo.SVGSurface(outfilename, w, h)
-            elif options.format == "png":
-                surface = cairo.ImageSurface(
-                    cairo.FORMAT_ARGB32, int(w + 1), int(h + 1)
-                )
-            else:
-                assert False, f"unknown format {options.format}"
-            cr = cairo.Context(surface)
-            view.matrix.translate(-view.bounding_box.x, -view.bounding_box.y)
-            view.paint(cr)
-            cr.show_page()
-
-            if options.format == "png":
-                surface.write_to_png(outfilename)
-
-            surface.flush()
-            surface.finish()
+            jobs.append((pname, diagram.id, outfilename))
+
+        def report(pname, outfilename, duration):
+            message(f"rendered: {pname} -> {outfilename} in {duration:.2f}s")
+
+        if options.jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+                futures = [
+                    (
+                        pname,
+                        outfilename,
+                        executor.submit(
+                            render_job,
+                            filename,
+                            diagram_id,
+                            outfilename,
+                            options.format,
+                        ),
+                    )
+                    for pname, diagram_id, outfilename in jobs
+                ]
+                for pname, outfilename, future in futures:
+                    try:
+                        report(pname, outfilename, future.result())
+                        rendered += 1
+                    except Exception as e:
+                        print(f"failed to render {pname}: {e}", file=sys.stderr)
+                        failed += 1
+        else:
+            for pname, diagram_id, outfilename in jobs:
+                message(f"rendering: {pname} -> {outfilename}...")
+                try:
+                    report(
+                        pname,
+                        outfilename,
+                        render_job(filename, diagram_id, outfilename, options.format),
+                    )
+                    rendered += 1
+                except Exception as e:
+                    print(f"failed to render {pname}: {e}", file=sys.stderr)
+                    failed += 1
+
+        # Free the model before loading the next one
+        del _models[filename]
+
+    message(
+        f"rendered {rendered}, skipped {skipped}, failed {failed} diagrams"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
+
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,58 @@
+"""
+Test the gaphorconvert diagram rendering tool.
+"""
+
+import os
+
+import importlib_metadata
+import pytest
+
+from gaphor import UML
+from gaphor.tools import gaphorconvert
+
+MAGIC = {"pdf": b"%PDF", "svg": b"<?xml", "png": b"\x89PNG"}
+
+
+@pytest.fixture
+def model_file():
+    dist = importlib_metadata.distribution("gaphor")
+    filename = str(dist.locate_file("test-diagrams/simple-items.gaphor"))
+    yield filename
+    gaphorconvert._models.pop(filename, None)
+
+
+def test_is_up_to_date(tmp_path):
+    model = tmp_path / "model.gaphor"
+    model.write_text("")
+    out = tmp_path / "diagram.pdf"
+
+    assert not gaphorconvert.is_up_to_date(str(out), str(model))
+
+    out.write_text("")
+    mtime = os.path.getmtime(model)
+    os.utime(out, (mtime + 10, mtime + 10))
+    assert gaphorconvert.is_up_to_date(str(out), str(model))
+
+    os.utime(model, (mtime + 20, mtime + 20))
+    assert not gaphorconvert.is_up_to_date(str(out), str(model))
+
+
+def test_load_model_once(model_file):
+    model = gaphorconvert.load_model(model_file)
+
+    assert model.lselect(lambda e: e.isKindOf(UML.Diagram))
+    assert gaphorconvert.load_model(model_file) is model
+
+
+@pytest.mark.parametrize("format", ["pdf", "svg", "png"])
+def test_render_job(model_file, tmp_path, format):
+    model = gaphorconvert.load_model(model_file)
+    diagram = model.lselect(lambda e: e.isKindOf(UML.Diagram))[0]
+    outfilename = str(tmp_path / f"diagram.{format}")
+
+    duration = gaphorconvert.render_job(model_file, diagram.id, outfilename, format)
+
+    assert duration >= 0
+    with open(outfilename, "rb") as f:
+        assert f.read().startswith(MAGIC[format])
+    assert gaphorconvert.is_up_to_date(outfilename, model_file)
@@ -24,6 +24,7 @@ from gaphor.diagram.support import get_diagram_item
 from gaphor.transaction import Transaction
 from gaphor.ui.diagramtoolbox import DiagramToolbox
 from gaphor.ui.event import DiagramSelectionChange
+from gaphor.ui.tilecache import TiledItemPainter, TiledView
 
 log = logging.getLogger(__name__)
 
@@ -101,7 +102,11 @@ class DiagramPage(ActionProvider):
         """
         assert self.diagram
 
-        view = GtkView(canvas=self.diagram.canvas)
+        if self.properties("diagram.tile-cache", False):
+            view = TiledView(canvas=self.diagram.canvas)
+        else:
+            view = GtkView(canvas=self.diagram.canvas)
+        self.diagram.canvas.show()
         try:
             view.set_css_name("diagramview")
         except AttributeError:
@@ -150,6 +155,8 @@ class DiagramPage(ActionProvider):
         """
         self.widget.destroy()
         self.event_manager.unsubscribe(self._on_element_delete)
+        if self.view:
+            self.diagram.canvas.hide()
         self.view = None
 
     @action(name="diagram-zoom-in", stock_id="gtk-zoom-in")
@@ -192,7 +199,8 @@ class DiagramPage(ActionProvider):
         greater than 0.0, the FreeHandPainter instances will be used
         for both the item painter and the box painter.  Otherwise, by
         default, the ItemPainter is used for the item and
-        BoundingBoxPainter for the box."""
+        BoundingBoxPainter for the box.  If the view keeps a tiled back
+        buffer, the item painter draws through the tile cache."""
 
         view = self.view
 
@@ -206,6 +214,9 @@ class DiagramPage(ActionProvider):
             item_painter = ItemPainter()
             box_painter = BoundingBoxPainter()
 
+        if isinstance(view, TiledView):
+            item_painter = view.tile_painter = TiledItemPainter(item_painter)
+
         view.painter = (
             PainterChain()
             .append(item_painter)
@@ -38,3 +38,25 @@ class FilenameChanged:
     def __init__(self, service, filename=None):
         self.service = service
         self.filename = filename
+
+
+class FileLoaded:
+    """
+    A model has been loaded from a file. If `recovered` is set, autosaved
+    changes were applied to the model.
+    """
+
+    def __init__(self, service, filename, recovered=False):
+        self.service = service
+        self.filename = filename
+        self.recovered = recovered
+
+
+class FileSaved:
+    """
+    A model has been saved to a file.
+    """
+
+    def __init__(self, service, filename):
+        self.service = service
+        self.filename = filename
@@ -210,9 +210,8 @@ class MainWindow(Service, ActionProvider):
         Open the toplevel element and load toplevel diagrams.
         """
         # TODO: Make handlers for ModelFactoryEvent from within the GUI obj
-        for diagram in self.element_factory.select(
-            lambda e: e.isKindOf(UML.Diagram)
-            and not (e.namespace and e.namespace.namespace)
+        for diagram in self.element_factory.select_type(
+            UML.Diagram, lambda e: not (e.namespace and e.namespace.namespace)
         ):
             self.event_manager.handle(DiagramShow(diagram))
 
@@ -302,11 +301,14 @@ class Diagrams(UIComponent, ActionProvider):
         self.event_manager.subscribe(self._on_show_diagram)
         self.event_manager.subscribe(self._on_name_change)
         self.event_manager.subscribe(self._on_flush_model)
+        # Only keep the items of diagrams that are shown up to date
+        self._set_lazy_watchers(True)
         return self._notebook
 
     def close(self):
         """Close the diagrams component."""
 
+        self._set_lazy_watchers(False)
         self.event_manager.unsubscribe(self._on_flush_model)
         self.event_manager.unsubscribe(self._on_name_change)
         self.event_manager.unsubscribe(self._on_show_diagram)
@@ -314,6 +316,11 @@ class Diagrams(UIComponent, ActionProvider):
             self._notebook.destroy()
             self._notebook = None
 
+    def _set_lazy_watchers(self, lazy):
+        self.element_factory.lazy_watchers = lazy
+        for diagram in self.element_factory.select_type(UML.Diagram):
+            diagram.canvas.update_watchers()
+
     def get_current_diagram(self):
         """Returns the current page of the notebook.
 
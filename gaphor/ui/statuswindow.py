@@ -86,12 +86,13 @@ class StatusWindow:
 def progress_idle_handler(progress_bar, queue):
     """This is a gobject idle handler that updates the supplied progress bar.
     The percentage is retrieved from the queue until it is empty.  The progress
-    bar is then updated with the current percentage."""
+    bar is then updated with the current percentage.  None values, put on
+    the queue while no progress is made, are skipped."""
 
     percentage = 0
     try:
         while True:
-            percentage = queue.get()
+            percentage = queue.get() or percentage
     except QueueEmpty:
         pass
     if percentage:
@@ -0,0 +1,168 @@
+"""
+Test the tiled back buffer, including a benchmark for panning large
+diagrams. The view is painted on an offscreen image surface.
+"""
+
+import time
+
+import cairo
+import pytest
+from gaphas.canvas import Context
+from gaphas.painter import ItemPainter
+from gaphas.view import View
+
+from gaphor import UML
+from gaphor.diagram.classes.klass import ClassItem
+from gaphor.services.eventmanager import EventManager
+from gaphor.ui.tilecache import TiledItemPainter
+
+WIDTH = 800
+HEIGHT = 600
+
+
+@pytest.fixture
+def diagram():
+    element_factory = UML.ElementFactory(EventManager())
+    diagram = element_factory.create(UML.Diagram)
+    for i in range(400):
+        klass = element_factory.create(UML.Class)
+        klass.name = f"Class {i}"
+        for j in range(5):
+            attr = element_factory.create(UML.Property)
+            attr.name = f"attribute{j}"
+            attr.typeValue = "int"
+            klass.ownedAttribute = attr
+        item = diagram.create(ClassItem, subject=klass)
+        item.matrix.translate((i % 20) * 200, (i // 20) * 200)
+    diagram.canvas.update_now()
+    return diagram
+
+
+def create_view(diagram, painter):
+    view = View(diagram.canvas)
+    view.painter = painter
+    view.update_bounding_box(cairo.Context(offscreen_surface()))
+    return view
+
+
+def offscreen_surface():
+    return cairo.ImageSurface(cairo.FORMAT_ARGB32, WIDTH, HEIGHT)
+
+
+def update(view, items=(), matrix_only_items=()):
+    """Do what a GtkView does when items, or the view's matrix, change."""
+    painter = view.painter
+    if isinstance(painter, TiledItemPainter):
+        painter.request_update(items, matrix_only_items)
+    view.update_bounding_box(cairo.Context(offscreen_surface()))
+    if isinstance(painter, TiledItemPainter):
+        painter.bounds_updated()
+
+
+def paint(view, surface):
+    cr = cairo.Context(surface)
+    items = view.get_items_in_rectangle((0, 0, WIDTH, HEIGHT))
+    view.painter.paint(Context(cairo=cr, items=items, area=None))
+    surface.flush()
+
+
+class CountingItemPainter(ItemPainter):
+    """Count the items drawn."""
+
+    drawn = 0
+
+    def _draw_item(self, item, cr, area=None):
+        self.drawn += 1
+        super()._draw_item(item, cr, area)
+
+
+def pan(view, frames, dx, dy):
+    """Pan the view over ``frames`` frames. Returns the latency of each
+    frame, in seconds. Only painting is measured, not the update of the
+    view's bounding boxes."""
+    surface = offscreen_surface()
+    items = view.canvas.get_all_items()
+    latencies = []
+    for _ in range(frames):
+        view.matrix.translate(dx, dy)
+        update(view, matrix_only_items=items)
+        start = time.perf_counter()
+        paint(view, surface)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def frame_rate(latencies):
+    """Frames per second, and the latency of the slowest frame."""
+    return len(latencies) / sum(latencies), max(latencies)
+
+
+def test_tiles_are_reused_when_panning(diagram):
+    painter = TiledItemPainter(ItemPainter(), tile_size=100)
+    view = create_view(diagram, painter)
+
+    paint(view, offscreen_surface())
+    assert painter.rendered_tiles == 8 * 6
+
+    pan(view, 1, -10, 0)
+    # Only the tiles that scrolled into view
+    assert painter.rendered_tiles == 8 * 6 + 6
+
+
+def test_changed_item_invalidates_its_tiles(diagram):
+    painter = TiledItemPainter(ItemPainter(), tile_size=100)
+    view = create_view(diagram, painter)
+    paint(view, offscreen_surface())
+    rendered = painter.rendered_tiles
+
+    item = diagram.canvas.get_root_items()[0]
+    item.subject.name = "A much longer name for this class"
+    diagram.canvas.update_now()
+    update(view, items=[item])
+    paint(view, offscreen_surface())
+
+    assert 0 < painter.rendered_tiles - rendered < 8 * 6
+
+
+def test_zoom_renders_all_tiles(diagram):
+    painter = TiledItemPainter(ItemPainter(), tile_size=100)
+    view = create_view(diagram, painter)
+    paint(view, offscreen_surface())
+
+    view.matrix.scale(0.5, 0.5)
+    update(view, matrix_only_items=diagram.canvas.get_all_items())
+    paint(view, offscreen_surface())
+
+    assert painter.rendered_tiles == 2 * 8 * 6
+
+
+def test_pan_large_diagram(diagram):
+    """
+    Panning a diagram with tiles copies the tiles, instead of drawing all
+    items over and over again.
+    """
+    direct = CountingItemPainter()
+    pan(create_view(diagram, direct), 50, -8, -6)
+    tiled = CountingItemPainter()
+    pan(create_view(diagram, TiledItemPainter(tiled)), 50, -8, -6)
+
+    assert tiled.drawn < direct.drawn / 2
+
+
+@pytest.mark.benchmark
+def test_pan_large_diagram_frame_rate(diagram):
+    """
+    Panning with tiles gives a higher frame rate, and no frame takes longer
+    than painting all items directly. Both views are painted once before
+    panning starts.
+    """
+    direct_view = create_view(diagram, ItemPainter())
+    tiled_view = create_view(diagram, TiledItemPainter(ItemPainter()))
+    paint(direct_view, offscreen_surface())
+    paint(tiled_view, offscreen_surface())
+
+    direct_fps, direct_worst = frame_rate(pan(direct_view, 50, -8, -6))
+    tiled_fps, tiled_worst = frame_rate(pan(tiled_view, 50, -8, -6))
+
+    assert tiled_fps > direct_fps, (tiled_fps, direct_fps)
+    assert tiled_worst < direct_worst, (tiled_worst, direct_worst)
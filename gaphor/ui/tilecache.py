@@ -0,0 +1,202 @@
+"""
+A tiled back buffer for diagram views.
+
+The items of a diagram are rendered in image tiles, at the current zoom
+level. When the view is panned, the tiles are simply copied to the view's
+back buffer. Only tiles in the area of changed items are rendered again.
+
+Tiles are positioned relative to the view's origin, without the scroll
+offset, so they stay valid while panning. A zoom invalidates all tiles.
+"""
+
+from collections import OrderedDict
+from math import ceil, floor
+
+import cairo
+from gaphas.canvas import Context
+from gaphas.painter import Painter
+from gaphas.view import GtkView
+
+# Tile width and height, in pixels
+TILE_SIZE = 256
+
+# The number of tiles kept around, about 256KiB each
+MAX_TILES = 128
+
+# Extra space around item bounding boxes, e.g. for line joins
+INVALIDATE_MARGIN = 2
+
+
+class TiledItemPainter(Painter):
+    """
+    Paint items through a cache of image tiles. The actual drawing is done
+    by the item painter.
+
+    The view should tell the painter which items are about to be updated,
+    through `request_update()`, when their new bounding boxes are known,
+    through `bounds_updated()`, and which items should be drawn again,
+    through `invalidate()`.
+    """
+
+    def __init__(self, item_painter, tile_size=TILE_SIZE, max_tiles=MAX_TILES):
+        super().__init__()
+        self.item_painter = item_painter
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._scale = None
+        self._offset = (0, 0)
+        self._pending = {}
+        self._updating = False
+        self.rendered_tiles = 0
+
+    def set_view(self, view):
+        super().set_view(view)
+        self.item_painter.set_view(view)
+        self.clear()
+
+    def clear(self):
+        """
+        Drop all tiles.
+        """
+        self._tiles.clear()
+        self._pending.clear()
+
+    def _item_bounds(self, item):
+        """
+        The bounds of an item, relative to the tile origin.
+        """
+        try:
+            x, y, w, h = self.view.get_item_bounding_box(item)
+        except KeyError:
+            return None
+        ox, oy = self._offset
+        return (round(x - ox, 2), round(y - oy, 2), round(w, 2), round(h, 2))
+
+    def _update_matrix(self):
+        xx, yx, xy, yy, x0, y0 = self.view.matrix
+        scale = (xx, yx, xy, yy)
+        if scale != self._scale:
+            self.clear()
+            self._scale = scale
+        # Tiles are aligned to whole pixels, to avoid resampling
+        self._offset = (round(x0), round(y0))
+
+    def invalidate_area(self, bounds):
+        """
+        Drop the tiles that overlap with bounds (x, y, width, height),
+        relative to the tile origin.
+        """
+        size = self.tile_size
+        m = INVALIDATE_MARGIN
+        x, y, w, h = bounds
+        for j in range(floor((y - m) / size), floor((y + h + m) / size) + 1):
+            for i in range(floor((x - m) / size), floor((x + w + m) / size) + 1):
+                self._tiles.pop((i, j), None)
+
+    def invalidate(self, items):
+        """
+        The items should be drawn again, e.g. because they got selected.
+        """
+        for item in items:
+            bounds = self._item_bounds(item)
+            if bounds:
+                self.invalidate_area(bounds)
+
+    def request_update(self, items, matrix_only_items=(), removed_items=()):
+        """
+        Items are about to be updated. The area they cover now is drawn
+        again. Items that are updated or moved are drawn again once the
+        view has calculated their new bounding box, see `bounds_updated()`.
+        """
+        self.invalidate(items)
+        self.invalidate(removed_items)
+        pending = self._pending
+        for item in items:
+            pending[item] = None
+        for item in matrix_only_items:
+            if item not in pending:
+                pending[item] = self._item_bounds(item)
+        for item in removed_items:
+            pending.pop(item, None)
+        self._updating = True
+
+    def bounds_updated(self):
+        """
+        The view calculated the bounding boxes of the updated items.
+        Invalidate the tiles of the items that changed or moved. Items that
+        only moved because the view is scrolled keep their tiles.
+        """
+        self._update_matrix()
+        for item, old_bounds in self._pending.items():
+            bounds = self._item_bounds(item)
+            if bounds != old_bounds:
+                if old_bounds:
+                    self.invalidate_area(old_bounds)
+                if bounds:
+                    self.invalidate_area(bounds)
+        self._pending.clear()
+        self._updating = False
+
+    def _render_tile(self, i, j):
+        size = self.tile_size
+        ox, oy = self._offset
+        x, y = i * size + ox, j * size + oy
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+        # The item painter draws in view coordinates
+        surface.set_device_offset(-x, -y)
+        cr = cairo.Context(surface)
+        items = self.view.get_items_in_rectangle((x, y, size, size))
+        self.item_painter.paint(Context(cairo=cr, items=items, area=None))
+        surface.flush()
+        self.rendered_tiles += 1
+        return surface
+
+    def paint(self, context):
+        if self._updating:
+            # Bounding boxes are outdated, do not cache what's drawn now
+            self.item_painter.paint(context)
+            return
+
+        self._update_matrix()
+        ox, oy = self._offset
+        size = self.tile_size
+        tiles = self._tiles
+        cr = context.cairo
+        x1, y1, x2, y2 = cr.clip_extents()
+        for j in range(floor((y1 - oy) / size), ceil((y2 - oy) / size)):
+            for i in range(floor((x1 - ox) / size), ceil((x2 - ox) / size)):
+                try:
+                    tile = tiles[i, j]
+                    tiles.move_to_end((i, j))
+                except KeyError:
+                    tile = tiles[i, j] = self._render_tile(i, j)
+                cr.set_source_surface(tile, i * size + ox, j * size + oy)
+                cr.paint()
+
+        while len(tiles) > self.max_tiles:
+            tiles.popitem(last=False)
+
+
+class TiledView(GtkView):
+    """
+    A view that keeps its items in a tiled back buffer. Set a
+    `TiledItemPainter` as `tile_painter`, and use it in the view's painter.
+    """
+
+    tile_painter = None
+
+    def request_update(self, items, matrix_only_items=(), removed_items=()):
+        if self.tile_painter:
+            self.tile_painter.request_update(items, matrix_only_items, removed_items)
+        super().request_update(items, matrix_only_items, removed_items)
+
+    def update_bounding_box(self, items):
+        super().update_bounding_box(items)
+        if self.tile_painter:
+            self.tile_painter.bounds_updated()
+
+    def queue_draw_item(self, *items):
+        if self.tile_painter:
+            self.tile_painter.invalidate(items)
+        super().queue_draw_item(*items)
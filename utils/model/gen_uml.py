@@ -21,7 +21,7 @@ from utils.model import override
 
 header = """# This file is generated by build_uml.py. DO NOT EDIT!
 
-from gaphor.UML.properties import association, attribute, enumeration, derived, derivedunion, redefine
+from gaphor.UML.properties import association, attribute, enumeration, derived, derivedunion, redefine, memoized
 """
 
 # Make getitem behave more politely